@@ -1,12 +1,67 @@
-from utils.common import fetch_price_data
-from models.lstm_model import audit_lstm_accuracy
-from models.ml_models import audit_ml_accuracy
+import os
+import argparse
+import pandas as pd
 
-ticker = "AAPL"
-df = fetch_price_data(ticker, start_date="2018-01-01", end_date="2023-12-31")
+from utils.helpers import load_config
+from utils.price_store import get_prices
+from models.walk_forward_audit import run_audit, AUDIT_MODELS
 
-print("🔍 LSTM Accuracy Audit")
-print(audit_lstm_accuracy(ticker, df))
+OUTPUT_PATH = "data/model_audit.csv"
 
-print("\n🔍 XGBoost/ML Accuracy Audit")
-print(audit_ml_accuracy(df))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward accuracy audit of the forecasting models.")
+    parser.add_argument("--tickers", nargs="+", default=["AAPL"], help="Tickers to audit, or 'SP500' for the universe.")
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default="2023-12-31")
+    parser.add_argument("--models", nargs="+", default=AUDIT_MODELS, choices=AUDIT_MODELS)
+    parser.add_argument("--horizons", nargs="+", type=int, help="Forecast horizons in bars (default: config forecast_days).")
+    parser.add_argument("--origins", type=int, default=20, help="Rolling origins per ticker and horizon.")
+    parser.add_argument("--step", type=int, default=5, help="Bars between origins.")
+    parser.add_argument("--train-window", type=int, help="Rolling training window in bars (default: expanding).")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: config scan.workers).")
+    parser.add_argument("--record-outcomes", action="store_true",
+                        help="Feed BUY/SELL fold outcomes into the performance store behind the ensemble weights.")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    horizons = args.horizons or [config.get("forecast_days", 5)]
+    workers = args.workers if args.workers is not None else config.get("scan", {}).get("workers", 1)
+
+    tickers = args.tickers
+    if tickers == ["SP500"]:
+        from utils.sp500_tickers import get_sp500_tickers
+        tickers = get_sp500_tickers()
+
+    print(f"📥 Loading prices for {len(tickers)} tickers...")
+    frames = get_prices(tickers, args.start, args.end)
+
+    print(f"🔍 Auditing {', '.join(args.models)} over {args.origins} origins x {len(horizons)} horizon(s) ({workers} worker(s))...")
+    folds, summary = run_audit(
+        frames, models=args.models, horizons=horizons, n_origins=args.origins, step=args.step,
+        train_window=args.train_window, workers=workers,
+    )
+    if summary.empty:
+        print("❌ No folds completed.")
+        return
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    summary.to_csv(OUTPUT_PATH)
+    print(f"💾 Saved to {OUTPUT_PATH}")
+
+    if args.record_outcomes:
+        from models.dynamic_tuner import update_model_accuracies, tune_model_weights
+
+        called = folds[folds["signal"].isin(["BUY", "SELL"])]
+        update_model_accuracies(
+            {"model": row.model, "ticker": row.ticker, "horizon": int(row.horizon), "signal": row.signal,
+             "realized_return": float(row.realized), "correct": (row.signal == "BUY") == (row.realized > 0)}
+            for row in called.itertuples()
+        )
+        print(f"🧮 Recorded {len(called)} outcomes; weights: {tune_model_weights()}")
+    with pd.option_context("display.float_format", "{:.4f}".format):
+        print(summary.xs("ALL", level="ticker"))
+
+
+if __name__ == "__main__":
+    main()
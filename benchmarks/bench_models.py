@@ -0,0 +1,226 @@
+# bench_models.py
+# Wall time, peak memory and fits/sec of every forecasting model, plus end-to-end
+# scan throughput, on synthetic OHLCV data. Runs fully offline.
+#
+#   python -m benchmarks.bench_models [--sizes 1y 5y] [--models ARIMA XGBoost] [--repeat 3] [--scan-tickers 20]
+#
+# Price store, artifact registry and model state are pointed at a temporary directory
+# before any repo module is imported, so nothing is downloaded and no cache is reused.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "models.jsonl")
+
+# name: (bars, pandas frequency)
+SIZES = {
+    "1y": (252, "B"),
+    "5y": (1260, "B"),
+    "20y": (5040, "B"),
+    "60d_1h": (60 * 7, "h"),
+    "30d_5m": (30 * 78, "5min"),
+}
+END_DATE = "2024-12-31"
+FORECAST_DAYS = 5
+
+
+def synthetic_ohlcv(n_bars, freq="B", seed=0, s0=100.0, mu=0.08, sigma=0.25):
+    """Geometric Brownian motion closes with plausible Open/High/Low/Volume around them."""
+    rng = np.random.default_rng(seed)
+    periods_per_year = 252 if freq == "B" else 252 * 7 if freq == "h" else 252 * 78
+    dt = 1.0 / periods_per_year
+    log_returns = (mu - 0.5 * sigma ** 2) * dt + sigma * np.sqrt(dt) * rng.standard_normal(n_bars)
+    close = s0 * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[s0], close[:-1]])
+    wiggle = np.abs(rng.standard_normal(n_bars)) * sigma * np.sqrt(dt) * close
+    index = pd.date_range(end=END_DATE, periods=n_bars, freq=freq, name="Date")
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + wiggle,
+        "Low": np.minimum(open_, close) - wiggle,
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, n_bars).astype("float64"),
+    }, index=index)
+
+
+def _isolate(workdir):
+    """Points every on-disk cache at `workdir`; must run before repo modules are imported."""
+    os.environ["PRICE_STORE_DIR"] = os.path.join(workdir, "price_store")
+    os.environ["PRICE_STORE_OFFLINE"] = "1"
+    os.environ["ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["MODEL_STATE_DIR"] = os.path.join(workdir, "model_state")
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def model_runners():
+    """name -> callable(df, ticker); registries are bypassed so every call is a full fit."""
+    from models.arima_model import forecast_arima
+    from models.garch_model import forecast_garch
+    from models.hmm_model import forecast_hmm
+    from models.lstm_model import forecast_lstm
+    from models.ml_models import forecast_ml
+    from models.ensemble import generate_forecast_ensemble
+
+    return {
+        "ARIMA": lambda df, t: forecast_arima(t, df, FORECAST_DAYS),
+        "GARCH": lambda df, t: forecast_garch(df, FORECAST_DAYS, ticker=t),
+        "HMM": lambda df, t: forecast_hmm(t, df, FORECAST_DAYS, use_registry=False),
+        "LSTM": lambda df, t: forecast_lstm(t, df, FORECAST_DAYS, use_registry=False),
+        "XGBoost": lambda df, t: forecast_ml(df, FORECAST_DAYS, ticker=t, use_registry=False),
+        # Its per-model calls go through the registry; a fresh seed per repeat keeps them cold
+        "Ensemble": lambda df, t: generate_forecast_ensemble(df, horizon="1 Week"),
+    }
+
+
+def _time_call(func, df, ticker):
+    start = time.perf_counter()
+    try:
+        func(df, ticker)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return time.perf_counter() - start, error
+
+
+def _peak_memory(func, df, ticker):
+    # Separate pass: tracemalloc slows Python-heavy code, so it never shares a run with the timer.
+    # It sees Python/NumPy allocations only, not TensorFlow's or XGBoost's native arenas.
+    tracemalloc.start()
+    try:
+        func(df, ticker)
+    except Exception:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def bench_model(name, func, size, repeat=3, seed=0):
+    n_bars, freq = SIZES[size]
+    # One warm-up call pays for imports and graph building, which are not part of a fit
+    _time_call(func, synthetic_ohlcv(n_bars, freq, seed=seed), "WARMUP")
+
+    samples, errors = [], []
+    for i in range(repeat):
+        seconds, error = _time_call(func, synthetic_ohlcv(n_bars, freq, seed=seed + 1 + i), f"SYN{i}")
+        samples.append(seconds)
+        if error:
+            errors.append(error)
+    peak = _peak_memory(func, synthetic_ohlcv(n_bars, freq, seed=seed + 1 + repeat), "SYNMEM")
+
+    median = statistics.median(samples)
+    return {
+        "model": name,
+        "size": size,
+        "bars": n_bars,
+        "median_s": round(median, 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "fits_per_s": round(1.0 / median, 3) if median > 0 else None,
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "errors": errors[:1],
+    }
+
+
+def bench_scan(n_tickers, enabled_models, size="5y", workers=1, seed=1000):
+    """Writes `n_tickers` synthetic series to the (temporary) price store and times run_scanner.run_scan."""
+    from utils.price_store import _write_store
+    import run_scanner
+
+    n_bars, freq = SIZES[size]
+    tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+    for i, ticker in enumerate(tickers):
+        df = synthetic_ohlcv(n_bars, freq, seed=seed + i)
+        _write_store(ticker, df, {"covered_from": str(df.index[0].date()), "checked_through": END_DATE})
+
+    context = {
+        "enabled_models": enabled_models,
+        "forecast_days": FORECAST_DAYS,
+        "model_weights": {},
+        "incremental": {},
+        "start_date": "1900-01-01",
+        "end_date": str(pd.Timestamp(END_DATE) + pd.Timedelta(days=1)),
+    }
+    start = time.perf_counter()
+    rows = run_scanner.run_scan(tickers, context, workers=workers, chunk_size=max(1, n_tickers // (4 * max(workers, 1))))
+    seconds = time.perf_counter() - start
+    return {
+        "tickers": n_tickers,
+        "completed": len(rows),
+        "size": size,
+        "workers": workers,
+        "models": sorted(m for m, on in enabled_models.items() if on),
+        "seconds": round(seconds, 3),
+        "tickers_per_s": round(len(rows) / seconds, 3) if seconds > 0 else None,
+    }
+
+
+def git_commit():
+    import subprocess
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(sizes=None, models=None, repeat=3, scan_tickers=20, scan_workers=1, scan_models=None, output=RESULTS_PATH):
+    workdir = tempfile.mkdtemp(prefix="bench_models_")
+    _isolate(workdir)
+    try:
+        runners = model_runners()
+        results = []
+        for name in models or list(runners):
+            for size in sizes or list(SIZES):
+                record = bench_model(name, runners[name], size, repeat=repeat)
+                results.append(record)
+                flag = f"  ⚠️ {record['errors'][0]}" if record["errors"] else ""
+                print(f"{name:10s} {size:8s} {record['median_s']:9.3f}s  {record['fits_per_s']:8.2f} fits/s  {record['peak_mb']:8.1f} MB{flag}")
+
+        scan = None
+        if scan_tickers:
+            enabled = {m: m in (scan_models or ["arima", "garch", "hmm", "ml"]) for m in ["arima", "garch", "hmm", "lstm", "ml"]}
+            scan = bench_scan(scan_tickers, enabled, workers=scan_workers)
+            print(f"📊 Scan: {scan['completed']}/{scan['tickers']} tickers in {scan['seconds']}s ({scan['tickers_per_s']} tickers/s)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "models": results,
+        "scan": scan,
+    }
+    if output:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"💾 Appended results to {output}")
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every forecasting model and the scan on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), help="Series lengths to run (default: all).")
+    parser.add_argument("--models", nargs="+", help="Models to run: ARIMA GARCH HMM LSTM XGBoost Ensemble (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed fits per model and size.")
+    parser.add_argument("--scan-tickers", type=int, default=20, help="Synthetic tickers for the scan benchmark (0 to skip).")
+    parser.add_argument("--scan-workers", type=int, default=1, help="Worker processes for the scan benchmark.")
+    parser.add_argument("--scan-models", nargs="+", help="Scanner models to enable: arima garch hmm lstm ml.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON-lines file to append the run to.")
+    args = parser.parse_args()
+    run(args.sizes, args.models, args.repeat, args.scan_tickers, args.scan_workers, args.scan_models, args.output)
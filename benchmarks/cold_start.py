@@ -0,0 +1,97 @@
+# cold_start.py
+# Measures the import-time (cold start) latency of every Streamlit page.
+#
+#   python -m benchmarks.cold_start [--repeat 5]
+#
+# Each page's module-level imports are replayed in a fresh interpreter, so the
+# number reflects what Streamlit pays before the page can render anything.
+
+import os
+import sys
+import ast
+import json
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PAGES_DIR = os.path.join(ROOT, "pages")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "cold_start.jsonl")
+
+_TIMER = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def page_imports(path):
+    """Source of every import statement at the top level of a page (including inside try blocks)."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+
+    imports = []
+    for node in tree.body:
+        nodes = [node] if not isinstance(node, ast.Try) else node.body
+        for child in nodes:
+            if isinstance(child, (ast.Import, ast.ImportFrom)):
+                imports.append(ast.get_source_segment(source, child))
+    return imports
+
+
+def time_imports(imports, repeat=5):
+    script = _TIMER.format(root=ROOT, imports="\n".join(imports))
+    samples = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()
+            return {"error": error[-1] if error else f"exit code {proc.returncode}"}
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1])["seconds"])
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(repeat=5, output=RESULTS_PATH):
+    pages = {}
+    for name in sorted(os.listdir(PAGES_DIR)):
+        if not name.endswith(".py"):
+            continue
+        pages[name] = time_imports(page_imports(os.path.join(PAGES_DIR, name)), repeat=repeat)
+        print(f"{name:45s} {pages[name].get('median_ms', pages[name].get('error'))}")
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "pages": pages,
+    }
+    if output:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"💾 Appended results to {output}")
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import latency of every page.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per page.")
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON-lines file to append the run to.")
+    args = parser.parse_args()
+    run(repeat=args.repeat, output=args.output)
@@ -0,0 +1,152 @@
+# backtest.py
+# Vectorized backtests of the features/strategies rules across a whole close panel
+# (dates x tickers) and a grid of parameters.
+
+import numpy as np
+import pandas as pd
+
+from features.panel_indicators import _as_2d, _ema_scan, _gains_losses, _rolling_mean, _rsi_from_means
+
+# Default parameter grids, one entry per parameter set
+DEFAULT_GRID = {
+    "rsi": [7, 14, 21, 28],
+    "macd": [(12, 26, 9), (8, 17, 9), (5, 35, 5)],
+    "ema_crossover": [(5, 20), (8, 21), (10, 50), (20, 100)],
+}
+
+
+class _LineCache:
+    """Shares EMA and RSI lines between parameter sets that reuse the same span or lookback."""
+
+    def __init__(self, values):
+        self.values = values
+        self._ema = {}
+        self._rsi = {}
+        self._gains_losses = None
+
+    def ema(self, span):
+        if span not in self._ema:
+            self._ema[span] = _ema_scan(self.values, span)[0]
+        return self._ema[span]
+
+    def rsi(self, lookback):
+        if lookback not in self._rsi:
+            if self._gains_losses is None:
+                self._gains_losses = _gains_losses(self.values)
+            gain, loss = self._gains_losses
+            self._rsi[lookback] = _rsi_from_means(_rolling_mean(gain, lookback), _rolling_mean(loss, lookback))
+        return self._rsi[lookback]
+
+
+def _crossover_events(fast, slow):
+    prev_fast = np.vstack([np.full((1, fast.shape[1]), np.nan), fast[:-1]])
+    prev_slow = np.vstack([np.full((1, slow.shape[1]), np.nan), slow[:-1]])
+    events = np.zeros(fast.shape, dtype=np.int8)
+    events[(fast > slow) & (prev_fast <= prev_slow)] = 1
+    events[(fast < slow) & (prev_fast >= prev_slow)] = -1
+    return events
+
+
+def rule_events(lines, strategy, param):
+    """+1 where the rule says BUY, -1 where it says SELL, 0 otherwise (same rules as features/strategies)."""
+    if strategy == "rsi":
+        value = lines.rsi(param)
+        events = np.zeros(value.shape, dtype=np.int8)
+        events[value < 30] = 1
+        events[value > 70] = -1
+        return events
+    if strategy == "macd":
+        fast, slow, signal = param
+        line = lines.ema(fast) - lines.ema(slow)
+        return _crossover_events(line, _ema_scan(line, signal)[0])
+    if strategy == "ema_crossover":
+        fast, slow = param
+        return _crossover_events(lines.ema(fast), lines.ema(slow))
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+def positions_from_events(events, holding_period=None, allow_short=True):
+    """
+    Position held after each bar's close. With a holding period, a position
+    lasts `holding_period` bars after its latest signal; without one, it is held
+    until the opposite signal.
+    """
+    T = events.shape[0]
+    rows = np.arange(T)[:, None]
+    last_event = np.maximum.accumulate(np.where(events != 0, rows, -1), axis=0)
+    direction = np.take_along_axis(events, np.maximum(last_event, 0), axis=0).astype("float64")
+    direction[last_event < 0] = 0.0
+    if holding_period:
+        direction[rows - last_event >= holding_period] = 0.0
+    if not allow_short:
+        direction[direction < 0] = 0.0
+    return direction
+
+
+def performance(positions, returns, cost_bps=0.0, periods_per_year=252):
+    """Per-ticker total return, Sharpe, max drawdown, trade count and exposure for a positions panel."""
+    held = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+    turnover = np.abs(np.diff(positions, axis=0, prepend=0.0))
+    strat = held * returns - turnover * cost_bps / 10000.0
+
+    equity = np.cumprod(1.0 + strat, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+    mean, std = strat.mean(axis=0), strat.std(axis=0, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    return {
+        "total_return": equity[-1] - 1.0,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.min(axis=0),
+        "n_trades": (turnover > 0).sum(axis=0),
+        "exposure": (held != 0).mean(axis=0),
+    }
+
+
+def backtest_panel(close, grid=None, holding_periods=(None,), cost_bps=5.0, allow_short=True, periods_per_year=252):
+    """
+    Backtests every (strategy, parameter set, holding period) in `grid` on every
+    ticker of `close` (wide dates x tickers DataFrame) and returns one row per
+    combination and ticker.
+
+    Signals are generated on a bar's close and traded from the next bar, and
+    `cost_bps` is charged on every unit of position change.
+    """
+    grid = DEFAULT_GRID if grid is None else grid
+    close = close.to_frame() if isinstance(close, pd.Series) else close
+    values = _as_2d(close)
+    lines = _LineCache(values)
+
+    prev = np.vstack([np.full((1, values.shape[1]), np.nan), values[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.nan_to_num(values / prev - 1.0, nan=0.0, posinf=0.0, neginf=0.0)
+
+    frames = []
+    for strategy, params in grid.items():
+        for param in params:
+            events = rule_events(lines, strategy, param)
+            for holding_period in holding_periods:
+                positions = positions_from_events(events, holding_period, allow_short)
+                # No position on bars without a price
+                positions[np.isnan(values)] = 0.0
+                stats = performance(positions, returns, cost_bps, periods_per_year)
+                frame = pd.DataFrame(stats, index=close.columns)
+                frame.index.name = "ticker"
+                frame.insert(0, "holding_period", holding_period if holding_period else 0)
+                frame.insert(0, "params", str(param))
+                frame.insert(0, "strategy", strategy)
+                frames.append(frame.reset_index())
+
+    return pd.concat(frames, ignore_index=True)[
+        ["strategy", "params", "holding_period", "ticker",
+         "total_return", "sharpe", "max_drawdown", "n_trades", "exposure"]
+    ]
+
+
+def best_parameters(results, metric="sharpe"):
+    """Mean of `metric` across tickers for each (strategy, params, holding period), best first."""
+    summary = results.groupby(["strategy", "params", "holding_period"])[
+        ["total_return", "sharpe", "max_drawdown", "n_trades"]
+    ].mean()
+    return summary.sort_values(metric, ascending=False)
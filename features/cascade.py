@@ -0,0 +1,79 @@
+# cascade.py
+# Stage one of the cascade scan: cheap, vectorised signals for the whole universe decide which
+# tickers are worth the full model stack.
+#
+# The indicators come from features.panel_indicators in one pass over a wide close panel; the
+# score is direction-agnostic, since a strong SELL is as much a candidate as a strong BUY.
+
+import numpy as np
+import pandas as pd
+
+from features.panel_indicators import compute_indicators
+
+ACTIONABLE = ["BUY", "SELL"]
+
+
+def _zscore(values):
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else values * 0.0
+
+
+def stage_one_scores(frames, lookback=14, momentum_window=20, macro_features=None):
+    """
+    One row per ticker of {ticker: OHLCV DataFrame} with the stage-one signals:
+    RSI, MACD histogram and EMA spread (both relative to price), momentum over
+    `momentum_window` bars, the market regime, and "score": the mean absolute
+    cross-sectional z-score of the four signals, plus one for a Bull/Bear regime.
+    "direction" is the sign of the summed signed z-scores. `macro_features`
+    applies the same macro downgrade to the regime as the full scan.
+    """
+    from models.ensemble import classify_market_regime
+
+    closes = {t: df["Close"] for t, df in frames.items() if df is not None and len(df) > momentum_window}
+    if not closes:
+        return pd.DataFrame(columns=["rsi", "macd_hist", "ema_spread", "momentum", "regime", "score", "direction"])
+    close = pd.DataFrame(closes).sort_index().ffill()
+    indicators = compute_indicators(close, lookback=lookback)
+    last = close.iloc[-1]
+
+    scores = pd.DataFrame({
+        "rsi": indicators["RSI"].iloc[-1],
+        "macd_hist": (indicators["MACD"].iloc[-1] - indicators["MACD_Signal"].iloc[-1]) / last,
+        "ema_spread": (indicators["EMA_Fast"].iloc[-1] - indicators["EMA_Slow"].iloc[-1]) / last,
+        "momentum": last / close.iloc[-1 - momentum_window] - 1.0,
+    })
+    scores["regime"] = [classify_market_regime(frames[t], macro_features) for t in scores.index]
+
+    signed = pd.concat([
+        _zscore(scores["rsi"] - 50.0), _zscore(scores["macd_hist"]),
+        _zscore(scores["ema_spread"]), _zscore(scores["momentum"]),
+    ], axis=1).fillna(0.0)
+    scores["score"] = signed.abs().mean(axis=1) + (scores["regime"] != "Neutral").astype(float)
+    scores["direction"] = np.sign(signed.sum(axis=1)).map({1.0: "BUY", -1.0: "SELL"}).fillna("HOLD")
+    return scores.sort_values("score", ascending=False)
+
+
+def select_candidates(scores, top_k=None, min_score=None):
+    """Tickers passing `min_score` (if set), best first, capped at `top_k` (if set)."""
+    selected = scores if min_score is None else scores[scores["score"] >= min_score]
+    if top_k is not None:
+        selected = selected.head(int(top_k))
+    return list(selected.index)
+
+
+def stage_one_recall(candidates, reference):
+    """
+    How much of a full run stage one would have kept: the share of the
+    reference's actionable (BUY/SELL) tickers that are among the candidates,
+    also restricted to its top-K by Confidence (K = number of candidates).
+    """
+    candidates = set(candidates)
+    actionable = reference[reference["Final Signal"].isin(ACTIONABLE)]
+    top = actionable.sort_values("Confidence", ascending=False).head(len(candidates))
+    return {
+        "candidates": len(candidates),
+        "reference_tickers": int(len(reference)),
+        "reference_actionable": int(len(actionable)),
+        "recall": round(float(actionable["Ticker"].isin(candidates).mean()), 4) if len(actionable) else None,
+        "recall_top_k": round(float(top["Ticker"].isin(candidates).mean()), 4) if len(top) else None,
+    }
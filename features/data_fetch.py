@@ -1,22 +1,22 @@
-import wbdata
-import pandas_datareader.data as web
-import yfinance as yf
 import pandas as pd
 import datetime
 
-# --- FRED data ---
+from utils.price_store import get_prices
+from features.macro_data import get_fred, get_world_bank
+
+# --- FRED data (cached, see features.macro_data) ---
 def get_fred_series(series_code, start, end):
-    return web.DataReader(series_code, "fred", start, end)
+    return get_fred(series_code, start, end)
 
-# --- World Bank data ---
+# --- World Bank data (cached, see features.macro_data) ---
 def get_world_bank_series(indicator_code, countries, label, start, end):
-    df = wbdata.get_dataframe({indicator_code: label}, country=countries).reset_index()
-    df['date'] = pd.to_datetime(df['date'], format='%Y')
-    if 'country' not in df.columns and len(countries) == 1:
-        df['country'] = list(countries.keys())[0]
-    return df[(df['date'] >= start) & (df['date'] <= end)]
+    df = get_world_bank(indicator_code, list(countries.values()), start, end)
+    return df.drop(columns="indicator").rename(columns={"value": label})
 
 # --- Stock price data ---
 def get_yahoo_prices(tickers, start, end):
-    df = yf.download(tickers, start=start, end=end, auto_adjust=True)["Close"]
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    frames = get_prices(tickers, start, end)
+    df = pd.DataFrame({t: frames[t]["Close"] for t in tickers if t in frames})
     return df.dropna()
@@ -0,0 +1,336 @@
+# intraday_stream.py
+# Event-driven intraday mode: bar sources plus an engine that updates per bar.
+#
+# A source yields (timestamp, bars) events, bars being a DataFrame of OHLCV rows indexed by
+# ticker. The engine is warmed up once on history; after that each closed bar only advances
+# carried state: indicators (features.panel_indicators), the GARCH variance recursion, the HMM
+# forward filter and the regime. Full GARCH/HMM refits run every `refit_every` bars, in a
+# background thread by default, and are caught up on the bars that arrived meanwhile.
+
+import time
+import numpy as np
+import pandas as pd
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from features.panel_indicators import PanelIndicatorState
+from utils.helpers import load_section
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Defaults, overridable through the "intraday" section of config/config.json
+SETTINGS = {
+    "refit_every": 60,          # bars between full GARCH/HMM refits
+    "history_bars": 2000,       # most recent bars a refit sees
+    "background_refit": True,   # refit in a worker thread so bar updates never wait on it
+    "poll_seconds": 30,
+}
+# classify_market_regime looks at the mean of the last 20 returns
+REGIME_WINDOW = 21
+
+
+def load_settings():
+    return load_section("intraday", SETTINGS)
+
+
+# === Bar sources ===
+class ReplaySource:
+    """
+    Replays {ticker: OHLCV DataFrame} bar by bar in timestamp order, starting
+    after `start` (exclusive) if given. Deterministic and offline: for tests,
+    benchmarks and backtesting the streaming path.
+    """
+
+    def __init__(self, frames, start=None):
+        panel = pd.concat({t: df[COLUMNS] for t, df in frames.items() if df is not None and not df.empty})
+        panel.index.names = ["Ticker", "Timestamp"]
+        panel = panel.swaplevel().sort_index()
+        if start is not None:
+            panel = panel[panel.index.get_level_values("Timestamp") > pd.Timestamp(start)]
+        self._panel = panel
+
+    def __iter__(self):
+        for timestamp, bars in self._panel.groupby(level="Timestamp", sort=True):
+            yield timestamp, bars.droplevel("Timestamp")
+
+
+class PollingSource:
+    """
+    Live bars for `tickers` from utils.helpers.fetch_price_data. Every poll
+    downloads the short `period` window and emits, in order, the bars that have
+    closed since the last one emitted; the newest bar is held back while it is
+    still forming. Iterating blocks between polls; poll() is the non-blocking
+    step for callers that schedule themselves (e.g. a Streamlit rerun).
+    """
+
+    def __init__(self, tickers, interval="5m", period="1d", poll_seconds=None, since=None, fetch=None):
+        if fetch is None:
+            from utils.helpers import fetch_price_data as fetch
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.period = period
+        self.poll_seconds = poll_seconds if poll_seconds is not None else load_settings()["poll_seconds"]
+        self.last_timestamp = pd.Timestamp(since) if since is not None else None
+        self._fetch = fetch
+
+    def poll(self):
+        """The events for the bars closed since the previous poll (possibly none)."""
+        frames = {t: self._fetch(t, interval=self.interval, period=self.period) for t in self.tickers}
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return []
+        # A bar is closed once any ticker has printed a later one
+        newest = max(df.index[-1] for df in frames.values())
+        closed = {t: df[df.index < newest] for t, df in frames.items()}
+        events = list(ReplaySource(closed, start=self.last_timestamp))
+        if events:
+            self.last_timestamp = events[-1][0]
+        return events
+
+    def __iter__(self):
+        while True:
+            try:
+                events = self.poll()
+            except Exception as e:
+                print(f"⚠️ Intraday poll failed: {e}")
+                events = []
+            yield from events
+            time.sleep(self.poll_seconds)
+
+
+# === Heavy fits (also what a background refit runs) ===
+def _fit_models(returns):
+    """
+    GARCH(1,1) and 3-state HMM fits on {ticker: (percent returns, previous HMM
+    parameters or None)}; EM is warm-started where parameters exist. Returns
+    {ticker: {"garch": state or None, "hmm": (model, state_prob) or None}}.
+    """
+    from models.garch_model import _fit_garch
+    from models.hmm_model import _fit_hmm
+
+    fits = {}
+    for ticker, (series, previous) in returns.items():
+        fit = {"garch": None, "hmm": None}
+        if len(series) >= 30:
+            try:
+                fit["garch"] = _fit_garch(series)[1]
+            except Exception as e:
+                print(f"❌ Intraday GARCH fit failed for {ticker}: {e}")
+        if len(series) >= 50:
+            try:
+                X = series.to_numpy().reshape(-1, 1)
+                model = _fit_hmm(X, previous)
+                fit["hmm"] = (model, model.predict_proba(X)[-1])
+            except Exception as e:
+                print(f"❌ Intraday HMM fit failed for {ticker}: {e}")
+        fits[ticker] = fit
+    return fits
+
+
+class IntradayEngine:
+    """
+    Per-bar state for a fixed set of tickers. Build it with from_history() on
+    the bars seen so far, then feed every new closed bar to on_bar() (or
+    iterate run(source)); each call returns one row of live signals per ticker.
+    """
+
+    def __init__(self, tickers, refit_every=None, history_bars=None, background_refit=None, forecast_steps=5):
+        settings = load_settings()
+        self.tickers = list(tickers)
+        self.refit_every = int(refit_every if refit_every is not None else settings["refit_every"])
+        self.history_bars = int(history_bars if history_bars is not None else settings["history_bars"])
+        self.background_refit = settings["background_refit"] if background_refit is None else background_refit
+        self.forecast_steps = forecast_steps
+
+        n = len(self.tickers)
+        self.indicators = None
+        self.closes = {t: deque(maxlen=self.history_bars + 1) for t in self.tickers}
+        # GARCH: (tickers x 4) parameters and the recursion's carried variance / residual
+        self.garch_params = np.full((n, 4), np.nan)
+        self.garch_var = np.full(n, np.nan)
+        self.garch_resid = np.full(n, np.nan)
+        # HMM: fitted model and filtered state probabilities per ticker
+        self.hmm = {}
+
+        self.bars_since_refit = 0
+        self.refits = 0
+        self.latencies = deque(maxlen=1000)
+        self._executor = None
+        self._pending = None  # (future, returns seen since its snapshot)
+
+    @classmethod
+    def from_history(cls, frames, **kwargs):
+        """Warms up on {ticker: OHLCV DataFrame}: indicator state and a first full fit."""
+        engine = cls(list(frames), **kwargs)
+        close = pd.DataFrame({t: df["Close"] for t, df in frames.items()}).sort_index()
+        close = close.iloc[-(engine.history_bars + 1):]
+        engine.indicators = PanelIndicatorState.from_history(close)
+        for t in engine.tickers:
+            engine.closes[t].extend(close[t].dropna().to_numpy(dtype="float64"))
+        engine._apply_fits(_fit_models(engine._refit_inputs()))
+        return engine
+
+    # --- Refits ---
+    def _refit_inputs(self):
+        inputs = {}
+        for t in self.tickers:
+            closes = pd.Series(self.closes[t], dtype="float64")
+            previous = None
+            if t in self.hmm:
+                from models.hmm_model import _hmm_to_arrays
+                previous = _hmm_to_arrays(self.hmm[t][0])
+            inputs[t] = (100 * closes.pct_change().dropna(), previous)
+        return inputs
+
+    def _apply_fits(self, fits):
+        from models.garch_model import _param_array
+
+        for j, t in enumerate(self.tickers):
+            fit = fits.get(t, {})
+            if fit.get("garch") is not None:
+                state = fit["garch"]
+                self.garch_params[j] = _param_array([state])[0]
+                self.garch_var[j], self.garch_resid[j] = state["last_var"], state["last_resid"]
+            if fit.get("hmm") is not None:
+                self.hmm[t] = fit["hmm"]
+        self.refits += 1
+
+    def _schedule_refit(self):
+        inputs = self._refit_inputs()
+        if not self.background_refit:
+            self._apply_fits(_fit_models(inputs))
+            return
+        if self._executor is None:
+            # A thread, not a process: a spawned worker would re-run the Streamlit page as __main__
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intraday-refit")
+        self._pending = (self._executor.submit(_fit_models, inputs), [])
+
+    def _collect_refit(self):
+        """Swaps in a finished background refit and replays the bars it has not seen."""
+        future, missed = self._pending
+        if not future.done():
+            return
+        self._pending = None
+        try:
+            fits = future.result()
+        except Exception as e:
+            print(f"❌ Intraday refit failed: {e}")
+            return
+        self._apply_fits(fits)
+        if missed:
+            # One block, not bar by bar: a slow refit can leave hundreds of bars to catch up on
+            self._step_models(np.vstack(missed))
+
+    # --- Per-bar updates ---
+    def _step_models(self, block):
+        """Advances the GARCH recursion and HMM filters over a (bars x tickers) block of percent returns."""
+        from models.garch_model import _filter_panel
+        from models.hmm_model import _forward_filter
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var, resid, _ = _filter_panel(self.garch_params, self.garch_var, self.garch_resid, block)
+        fitted = ~np.isnan(self.garch_params[:, 0])
+        self.garch_var = np.where(fitted, var, self.garch_var)
+        self.garch_resid = np.where(fitted, resid, self.garch_resid)
+
+        for j, t in enumerate(self.tickers):
+            returns = block[:, j][~np.isnan(block[:, j])]
+            if t in self.hmm and len(returns):
+                model, state_prob = self.hmm[t]
+                self.hmm[t] = (model, _forward_filter(model, returns.reshape(-1, 1), state_prob)[0])
+
+    def _regimes(self):
+        """classify_market_regime on each ticker's last closes, without building frames."""
+        from models.ensemble import regime_from_return
+
+        regimes = []
+        for t in self.tickers:
+            # The last REGIME_WINDOW closes, read from the end of the deque without copying it
+            closes = np.fromiter(islice(reversed(self.closes[t]), REGIME_WINDOW), dtype="float64")[::-1]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                returns = closes[1:] / closes[:-1] - 1.0
+            regimes.append(regime_from_return(returns.mean() if len(returns) else np.nan))
+        return regimes
+
+    def on_bar(self, timestamp, bars):
+        """
+        Feeds one closed bar (DataFrame of OHLCV rows by ticker, or a Series of
+        closes) and returns a DataFrame of live signals indexed by ticker.
+        """
+        from utils.common import generate_signal_from_return
+        from models.garch_model import _forecast_panel, _signal
+        from models.hmm_model import SCALE
+
+        start = time.perf_counter()
+        close = bars["Close"] if isinstance(bars, pd.DataFrame) else bars
+        close = close.reindex(self.tickers).to_numpy(dtype="float64")
+        if self._pending is not None:
+            self._collect_refit()
+
+        last = np.array([self.closes[t][-1] if self.closes[t] else np.nan for t in self.tickers])
+        returns = 100 * (close / last - 1.0)
+        indicators = self.indicators.update(close)
+        crosses = self.indicators.crossover_signals()
+        self._step_models(returns[np.newaxis, :])
+        if self._pending is not None:
+            self._pending[1].append(returns)
+
+        for j, t in enumerate(self.tickers):
+            if not np.isnan(close[j]):
+                self.closes[t].append(close[j])
+
+        with np.errstate(invalid="ignore"):
+            next_var = _forecast_panel(self.garch_params, self.garch_var, self.garch_resid, 1)[:, 0]
+        hmm_state, hmm_prob, hmm_return = [], [], []
+        for t in self.tickers:
+            if t in self.hmm:
+                model, state_prob = self.hmm[t]
+                k = int(np.argmax(state_prob))
+                hmm_state.append(k)
+                hmm_prob.append(float(state_prob[k]))
+                hmm_return.append(float(model.means_[k, 0]) * self.forecast_steps / SCALE)
+            else:
+                hmm_state.append(-1)
+                hmm_prob.append(np.nan)
+                hmm_return.append(np.nan)
+
+        result = pd.DataFrame({
+            "Close": close,
+            "Return %": returns,
+            "RSI": indicators["RSI"].to_numpy(),
+            "MACD": indicators["MACD"].to_numpy(),
+            "MACD Signal": crosses["MACD"].to_numpy(),
+            "EMA Signal": crosses["EMA"].to_numpy(),
+            "Regime": self._regimes(),
+            "GARCH Vol %": np.sqrt(next_var),
+            "GARCH Signal": [_signal(mu) if not np.isnan(mu) else "HOLD" for mu in self.garch_params[:, 0]],
+            "HMM State": hmm_state,
+            "HMM Prob": hmm_prob,
+            "HMM Signal": [generate_signal_from_return(r) if not np.isnan(r) else "HOLD" for r in hmm_return],
+        }, index=pd.Index(self.tickers, name="Ticker"))
+        result.attrs["timestamp"] = pd.Timestamp(timestamp)
+
+        self.bars_since_refit += 1
+        if self.bars_since_refit >= self.refit_every and self._pending is None:
+            self.bars_since_refit = 0
+            self._schedule_refit()
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def run(self, source):
+        """Yields on_bar()'s result for every event of `source`."""
+        for timestamp, bars in source:
+            yield self.on_bar(timestamp, bars)
+
+    def latency_ms(self):
+        """p50 and max per-bar update time over the recent bars, in milliseconds."""
+        if not self.latencies:
+            return {"p50": None, "max": None}
+        values = np.array(self.latencies) * 1e3
+        return {"p50": round(float(np.median(values)), 3), "max": round(float(values.max()), 3)}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
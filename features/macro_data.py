@@ -0,0 +1,203 @@
+# macro_data.py
+# Cached access to FRED and World Bank macro series.
+#
+# Every (source, series, country set) has one Parquet entry plus a JSON sidecar recording the
+# date range that has been requested from the source and when. A request inside that range is
+# sliced from disk until the source's TTL runs out; a wider one fetches the union of both
+# ranges, so entries only ever grow. Fetchers are plain functions in FETCHERS, which tests can
+# replace (set_fetcher) to run on local fixtures without network access.
+
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+
+from utils.helpers import load_section
+
+CACHE_DIR = os.environ.get("MACRO_CACHE_DIR", "data/macro_cache")
+
+# Set MACRO_CACHE_OFFLINE=1 to serve only what is already on disk, however old
+OFFLINE = os.environ.get("MACRO_CACHE_OFFLINE", "0") == "1"
+
+# Defaults, overridable through the "macro_cache" section of config/config.json
+TTL_HOURS = {"fred": 12, "worldbank": 24 * 7, "countries": 24 * 30}
+
+
+def _settings():
+    return {**TTL_HOURS, **load_section("macro_cache").get("ttl_hours", {})}
+
+
+# === Default fetchers (network) ===
+def _fetch_fred(codes, start, end):
+    """DataFrame indexed by date with one column per FRED code, in one request."""
+    import pandas_datareader.data as web
+    return web.DataReader(list(codes), "fred", start, end)
+
+
+def _fetch_world_bank(codes, countries, start, end):
+    """
+    Long DataFrame (date, country, indicator, value) for all `codes` and ISO
+    `countries` in one request. The World Bank API is cheap per call but slow
+    per round trip, so the whole history is fetched and the cache slices it.
+    """
+    import wbdata
+    raw = wbdata.get_dataframe({code: code for code in codes}, country=list(countries)).reset_index()
+    if "country" not in raw.columns:
+        raw["country"] = countries[0]
+    long = raw.melt(id_vars=["country", "date"], value_vars=list(codes), var_name="indicator", value_name="value")
+    long["date"] = pd.to_datetime(long["date"], format="%Y")
+    return long
+
+
+def _fetch_countries():
+    """DataFrame of World Bank countries (id, name, region_id)."""
+    import wbdata
+    return pd.DataFrame(
+        [{"id": c["id"], "name": c["name"], "region_id": c["region"]["id"]} for c in wbdata.get_countries()]
+    )
+
+
+FETCHERS = {"fred": _fetch_fred, "worldbank": _fetch_world_bank, "countries": _fetch_countries}
+
+
+def set_fetcher(source, fetcher):
+    """Replaces the fetcher for "fred", "worldbank" or "countries" (e.g. with a local fixture)."""
+    FETCHERS[source] = fetcher
+
+
+# === Cache entries ===
+def _key(source, series, countries=()):
+    payload = json.dumps({"source": source, "series": series, "countries": sorted(countries)})
+    return f"{source}-{series}-{hashlib.sha1(payload.encode()).hexdigest()[:12]}"
+
+
+def _paths(key):
+    base = os.path.join(CACHE_DIR, key)
+    return base + ".parquet", base + ".json"
+
+
+def _read(key):
+    data_path, meta_path = _paths(key)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    return pd.read_parquet(data_path), meta
+
+
+def _write(key, df, meta):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    data_path, meta_path = _paths(key)
+    # Write-then-rename so a concurrent Streamlit session never reads a half-written entry
+    df.to_parquet(data_path + ".tmp")
+    os.replace(data_path + ".tmp", data_path)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def _fresh(meta, source, start, end, force=False):
+    """True when the entry covers [start, end] and is within the source's TTL (always, offline)."""
+    if meta is None:
+        return False
+    covers = pd.Timestamp(meta["start"]) <= start and pd.Timestamp(meta["end"]) >= end
+    if OFFLINE:
+        return True
+    age_hours = (time.time() - meta["fetched_at"]) / 3600
+    return covers and not force and age_hours < _settings()[source]
+
+
+def _fetch_range(meta, start, end):
+    # Grow the entry: the union of what is stored and what is asked for
+    if meta is None:
+        return start, end
+    return min(start, pd.Timestamp(meta["start"])), max(end, pd.Timestamp(meta["end"]))
+
+
+def _meta(start, end):
+    return {"start": str(start.date()), "end": str(end.date()), "fetched_at": time.time()}
+
+
+def _load(source, keys, start, end, force, fetch):
+    """
+    {code: cached frame} for `keys` ({code: cache key}). Codes whose entry is
+    missing, stale or too narrow are fetched together by fetch(codes, start,
+    end) -> {code: frame}. If that fails, stale entries are served instead.
+    """
+    entries = {code: _read(key) for code, key in keys.items()}
+    missing = [code for code, (_, meta) in entries.items() if not _fresh(meta, source, start, end, force)]
+    if missing:
+        ranges = [_fetch_range(entries[code][1], start, end) for code in missing]
+        fetch_start, fetch_end = min(r[0] for r in ranges), max(r[1] for r in ranges)
+        try:
+            fetched = fetch(missing, fetch_start, fetch_end)
+        except Exception as e:
+            if any(entries[code][0] is None for code in missing):
+                raise
+            print(f"⚠️ {source} fetch failed, serving cached data: {e}")
+        else:
+            for code in missing:
+                _write(keys[code], fetched[code], _meta(fetch_start, fetch_end))
+                entries[code] = (fetched[code], None)
+    return {code: df for code, (df, _) in entries.items()}
+
+
+# === Public API ===
+def get_fred(codes, start, end, force=False):
+    """
+    FRED series as a DataFrame indexed by date, one column per code (the shape
+    of pandas_datareader's DataReader). Codes missing from the cache (or stale,
+    or not covering the range) are fetched together in one request.
+    """
+    codes = [codes] if isinstance(codes, str) else list(codes)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+    def fetch(missing, fetch_start, fetch_end):
+        raw = FETCHERS["fred"](missing, fetch_start, fetch_end)
+        return {code: raw[[code]] if code in raw.columns else pd.DataFrame(columns=[code]) for code in missing}
+
+    frames = _load("fred", {code: _key("fred", code) for code in codes}, start, end, force, fetch)
+    df = pd.concat([frames[code] for code in codes], axis=1)
+    df.index = pd.DatetimeIndex(df.index)
+    return df[(df.index >= start) & (df.index <= end)]
+
+
+def get_world_bank(codes, countries, start, end, force=False):
+    """
+    World Bank indicators for ISO `countries` as a long DataFrame with columns
+    date, country, indicator and value. Indicators missing from the cache are
+    fetched in one batched request, then stored one entry per indicator.
+    """
+    codes = [codes] if isinstance(codes, str) else list(codes)
+    countries = list(countries)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if not codes or not countries:
+        return pd.DataFrame(columns=["date", "country", "indicator", "value"])
+
+    def fetch(missing, fetch_start, fetch_end):
+        raw = FETCHERS["worldbank"](missing, countries, fetch_start, fetch_end)
+        return {code: raw[raw["indicator"] == code].reset_index(drop=True) for code in missing}
+
+    keys = {code: _key("worldbank", code, countries) for code in codes}
+    frames = _load("worldbank", keys, start, end, force, fetch)
+    df = pd.concat([frames[code] for code in codes], ignore_index=True)
+    return df[(df["date"] >= start) & (df["date"] <= end)].reset_index(drop=True)
+
+
+def get_countries(force=False):
+    """World Bank country list (id, name, region_id), cached for the "countries" TTL."""
+    key = "worldbank-countries"
+    df, meta = _read(key)
+    fresh = meta is not None and (
+        OFFLINE or (not force and (time.time() - meta["fetched_at"]) / 3600 < _settings()["countries"])
+    )
+    if not fresh:
+        try:
+            df = FETCHERS["countries"]()
+            _write(key, df, {"fetched_at": time.time()})
+        except Exception as e:
+            if df is None:
+                raise
+            print(f"⚠️ Country list fetch failed, serving cached list: {e}")
+    return df
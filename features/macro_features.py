@@ -0,0 +1,181 @@
+# macro_features.py
+# Point-in-time macro feature matrix on the daily calendar.
+#
+# Every macro observation is stamped with the day it became public (end of its period plus a
+# release lag) and as-of joined onto the calendar, so a row only sees data released before
+# that day. The matrix is shared by all tickers, cached on disk and extended with new dates
+# only; models take it as an argument instead of aligning macro data themselves.
+#
+# FRED and the World Bank serve the latest vintage, not the first release: revisions leak in,
+# but release timing does not.
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+from utils.helpers import load_section
+
+CACHE_PATH = os.environ.get("MACRO_FEATURES_PATH", "data/macro_features.parquet")
+
+# name -> where the series comes from, how often it is observed, how many days after the end
+# of its period it is published, and how it is turned into a feature.
+# Overridable through the "macro_features" section of config/config.json.
+DEFAULT_SERIES = {
+    "fed_funds": {"source": "fred", "code": "FEDFUNDS", "frequency": "M", "release_lag_days": 1},
+    "fed_funds_3m_change": {"source": "fred", "code": "FEDFUNDS", "frequency": "M", "release_lag_days": 1,
+                            "transform": "diff", "periods": 3},
+    "cpi_yoy": {"source": "fred", "code": "CPIAUCSL", "frequency": "M", "release_lag_days": 15,
+                "transform": "pct_change", "periods": 12},
+    "unemployment": {"source": "fred", "code": "UNRATE", "frequency": "M", "release_lag_days": 7},
+    "unemployment_3m_change": {"source": "fred", "code": "UNRATE", "frequency": "M", "release_lag_days": 7,
+                               "transform": "diff", "periods": 3},
+    "real_gdp_growth": {"source": "fred", "code": "GDPC1", "frequency": "Q", "release_lag_days": 30,
+                        "transform": "pct_change", "periods": 1},
+    "gdp_growth_annual": {"source": "worldbank", "code": "NY.GDP.MKTP.KD.ZG", "country": "USA",
+                          "frequency": "Y", "release_lag_days": 120},
+}
+# Extra history fetched before the calendar so the transforms have something to difference
+HISTORY_YEARS = 3
+
+_MEMORY = {}
+
+
+def load_series_spec():
+    return load_section("macro_features").get("series") or DEFAULT_SERIES
+
+
+def _spec_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def release_dates(dates, frequency, lag_days):
+    """The day each observation (dated at the start of its period) becomes public."""
+    period_end = pd.DatetimeIndex(dates).to_period(frequency).to_timestamp(how="end").normalize()
+    return period_end + pd.Timedelta(days=int(lag_days))
+
+
+def _transform(values, spec):
+    kind, periods = spec.get("transform", "level"), spec.get("periods", 1)
+    if kind == "diff":
+        return values.diff(periods)
+    if kind == "pct_change":
+        return values.pct_change(periods, fill_method=None) * 100
+    return values
+
+
+def _raw_series(spec, start, end):
+    """{name: observations indexed by period date} for every series in `spec`, fetched in batches."""
+    from features.macro_data import get_fred, get_world_bank
+
+    raw = {}
+    fred_codes = sorted({s["code"] for s in spec.values() if s["source"] == "fred"})
+    if fred_codes:
+        fred = get_fred(fred_codes, start, end)
+        for name, s in spec.items():
+            if s["source"] == "fred" and s["code"] in fred:
+                raw[name] = fred[s["code"]].dropna()
+
+    wb_specs = {name: s for name, s in spec.items() if s["source"] == "worldbank"}
+    for country in sorted({s.get("country", "USA") for s in wb_specs.values()}):
+        names = [n for n, s in wb_specs.items() if s.get("country", "USA") == country]
+        wb = get_world_bank(sorted({wb_specs[n]["code"] for n in names}), [country], start, end)
+        for name in names:
+            rows = wb[wb["indicator"] == wb_specs[name]["code"]]
+            raw[name] = pd.Series(rows["value"].to_numpy(), index=pd.DatetimeIndex(rows["date"])).sort_index().dropna()
+    return raw
+
+
+def align_series(raw, spec, calendar):
+    """
+    As-of joins each series onto `calendar`: row t holds the latest transformed
+    value whose release date is strictly before t. Returns a (dates x features)
+    float DataFrame; NaN until a series' first release.
+    """
+    calendar = pd.DatetimeIndex(calendar)
+    out = np.full((len(calendar), len(spec)), np.nan)
+    for j, (name, s) in enumerate(spec.items()):
+        values = raw.get(name)
+        if values is None or values.empty:
+            continue
+        values = _transform(values.sort_index(), s).dropna()
+        released = release_dates(values.index, s["frequency"], s.get("release_lag_days", 0))
+        order = np.argsort(released.asi8, kind="stable")
+        released, data = released.asi8[order], values.to_numpy(dtype="float64")[order]
+        pos = np.searchsorted(released, calendar.asi8, side="left") - 1
+        out[:, j] = np.where(pos >= 0, data[np.clip(pos, 0, None)], np.nan)
+    return pd.DataFrame(out, index=calendar, columns=list(spec))
+
+
+def _read_cache(path):
+    meta_path = path + ".json"
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, "r") as f:
+        return pd.read_parquet(path), json.load(f)
+
+
+def _write_cache(path, matrix, meta):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    matrix.to_parquet(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    with open(path + ".json.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".json.tmp", path + ".json")
+
+
+def get_macro_features(start, end=None, spec=None, path=None, refresh=False):
+    """
+    The point-in-time macro matrix on the business-day calendar from `start` to
+    `end` (default: today). A cached matrix built with the same spec is reused
+    and only extended with the dates past its end; `refresh` rebuilds it.
+    """
+    spec = spec or load_series_spec()
+    path = path or CACHE_PATH
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp.today().normalize()
+    digest = _spec_hash(spec)
+
+    if refresh:
+        cached, meta = None, None
+    elif path in _MEMORY:
+        cached, meta = _MEMORY[path]
+    else:
+        cached, meta = _read_cache(path)
+    if cached is not None and (meta["spec"] != digest or pd.Timestamp(meta["start"]) > start):
+        cached = None
+
+    if cached is None:
+        calendar = pd.bdate_range(start, end)
+        matrix = align_series(_raw_series(spec, start - pd.DateOffset(years=HISTORY_YEARS), end), spec, calendar)
+        meta = {"spec": digest, "start": str(start.date()), "end": str(end.date())}
+    elif pd.Timestamp(meta["end"]) < end:
+        # Rows already stored are point-in-time and never change: only the new dates are aligned
+        calendar = pd.bdate_range(pd.Timestamp(meta["end"]) + pd.Timedelta(days=1), end)
+        fresh = align_series(_raw_series(spec, start - pd.DateOffset(years=HISTORY_YEARS), end), spec, calendar)
+        matrix = pd.concat([cached, fresh])
+        meta = dict(meta, end=str(end.date()))
+    else:
+        matrix = cached
+
+    if matrix is not cached:
+        _write_cache(path, matrix, meta)
+    _MEMORY[path] = (matrix, meta)
+    return matrix.loc[start:end]
+
+
+def align_macro(macro_features, index):
+    """The macro rows in effect on each date of `index` (a price frame's index), without look-ahead."""
+    return macro_features.reindex(pd.DatetimeIndex(index), method="ffill")
+
+
+def macro_risk_off(macro_row, unemployment_jump=0.5):
+    """
+    True when the latest macro data signals a downturn: unemployment up by
+    `unemployment_jump` points over three months (a Sahm-style trigger) or
+    contracting real GDP. Missing features count as no signal.
+    """
+    jump = macro_row.get("unemployment_3m_change", np.nan)
+    growth = macro_row.get("real_gdp_growth", np.nan)
+    return bool((not pd.isna(jump) and jump >= unemployment_jump) or (not pd.isna(growth) and growth < 0))
@@ -0,0 +1,243 @@
+# panel_indicators.py
+# RSI, MACD and EMA crossovers on a wide (dates x tickers) close panel in one NumPy pass,
+# with carried state so a new bar updates every ticker without touching the history.
+
+import numpy as np
+import pandas as pd
+
+
+def _as_2d(close):
+    values = np.asarray(close, dtype="float64")
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+def _wrap(values, like):
+    """Returns `values` shaped and labelled like the input (Series, DataFrame or array)."""
+    if isinstance(like, pd.Series):
+        return pd.Series(values[:, 0], index=like.index, name=like.name)
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(values, index=like.index, columns=like.columns)
+    return values[:, 0] if np.ndim(like) == 1 else values
+
+
+# === Core kernels (2-D arrays, time along axis 0) ===
+def _ema_scan(values, span, weighted=None, old_wt=None):
+    """
+    Exponential moving average with pandas `ewm(span, adjust=False)` semantics,
+    including its NaN handling. Returns (ema, weighted, old_wt); the last two are
+    the carried state for incremental updates.
+    """
+    alpha = 2.0 / (span + 1.0)
+    T, N = values.shape
+    out = np.full((T, N), np.nan)
+    weighted = np.full(N, np.nan) if weighted is None else weighted.copy()
+    old_wt = np.ones(N) if old_wt is None else old_wt.copy()
+    if T == 0:
+        return out, weighted, old_wt
+
+    observed = ~np.isnan(values)
+    first = np.where(observed.any(axis=0), observed.argmax(axis=0), T)
+    gaps = (~observed) & (np.arange(T)[:, None] > first)
+
+    if not gaps.any() and np.isnan(weighted).all():
+        # Fast path (no gaps after each ticker's first bar): a linear filter in C.
+        # Leading NaNs are back-filled with the first bar, which leaves the EMA flat there.
+        from scipy.signal import lfilter
+
+        cols = first < T
+        filled = values[:, cols].copy()
+        first_vals = filled[first[cols], np.arange(cols.sum())]
+        filled[np.isnan(filled)] = np.broadcast_to(first_vals, filled.shape)[np.isnan(filled)]
+        zi = ((1.0 - alpha) * first_vals)[np.newaxis, :]
+        out[:, cols] = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=zi)[0]
+        out[np.arange(T)[:, None] < first] = np.nan
+        weighted[cols] = out[-1, cols]
+        old_wt[:] = 1.0
+        return out, weighted, old_wt
+
+    for t in range(T):
+        weighted, old_wt = _ema_step(values[t], alpha, weighted, old_wt)
+        out[t] = weighted
+    return out, weighted, old_wt
+
+
+def _ema_step(row, alpha, weighted, old_wt):
+    observed = ~np.isnan(row)
+    started = ~np.isnan(weighted)
+
+    old_wt = np.where(started, old_wt * (1.0 - alpha), old_wt)
+    update = started & observed
+    blended = (old_wt * weighted + alpha * np.where(observed, row, 0.0)) / (old_wt + alpha)
+    weighted = np.where(update, blended, weighted)
+    weighted = np.where(~started & observed, row, weighted)
+    old_wt = np.where(observed, 1.0, old_wt)
+    return weighted, old_wt
+
+
+def _rolling_mean(values, window):
+    """pandas `rolling(window).mean()`: NaN until a full window of non-NaN values."""
+    T, N = values.shape
+    out = np.full((T, N), np.nan)
+    if T < window:
+        return out
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, N)), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, N)), np.cumsum(valid, axis=0)])
+    window_sum = sums[window:] - sums[:-window]
+    window_count = counts[window:] - counts[:-window]
+    out[window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
+
+def _gains_losses(values):
+    prev = np.vstack([np.full((1, values.shape[1]), np.nan), values[:-1]])
+    delta = values - prev
+    return np.clip(delta, 0, None), -np.clip(delta, None, 0)
+
+
+def _rsi_from_means(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+# === Public, full-history API ===
+def ema(close, span):
+    return _wrap(_ema_scan(_as_2d(close), span)[0], close)
+
+
+def rsi(close, lookback=14):
+    gain, loss = _gains_losses(_as_2d(close))
+    return _wrap(_rsi_from_means(_rolling_mean(gain, lookback), _rolling_mean(loss, lookback)), close)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    values = _as_2d(close)
+    line = _ema_scan(values, fast)[0] - _ema_scan(values, slow)[0]
+    return _wrap(line, close), _wrap(_ema_scan(line, signal)[0], close)
+
+
+def crossovers(fast_line, slow_line):
+    """Signal panel from two lines: 'BUY' where fast crosses above slow, 'SELL' where it crosses below."""
+    fast_values, slow_values = _as_2d(fast_line), _as_2d(slow_line)
+    above = fast_values > slow_values
+    below = fast_values < slow_values
+    prev_fast = np.vstack([np.full((1, fast_values.shape[1]), np.nan), fast_values[:-1]])
+    prev_slow = np.vstack([np.full((1, slow_values.shape[1]), np.nan), slow_values[:-1]])
+    signals = np.full(fast_values.shape, "HOLD", dtype=object)
+    signals[above & (prev_fast <= prev_slow)] = "BUY"
+    signals[below & (prev_fast >= prev_slow)] = "SELL"
+    return _wrap(signals, fast_line)
+
+
+def compute_indicators(close, lookback=14, fast=8, slow=21):
+    """
+    All indicators of features.tech_indicators for a close Series or a wide
+    (dates x tickers) DataFrame: {"RSI", "MACD", "MACD_Signal", "EMA_Fast", "EMA_Slow"}.
+    """
+    values = _as_2d(close)
+    gain, loss = _gains_losses(values)
+    macd_line = _ema_scan(values, 12)[0] - _ema_scan(values, 26)[0]
+    return {
+        "RSI": _wrap(_rsi_from_means(_rolling_mean(gain, lookback), _rolling_mean(loss, lookback)), close),
+        "MACD": _wrap(macd_line, close),
+        "MACD_Signal": _wrap(_ema_scan(macd_line, 9)[0], close),
+        "EMA_Fast": _wrap(_ema_scan(values, fast)[0], close),
+        "EMA_Slow": _wrap(_ema_scan(values, slow)[0], close),
+    }
+
+
+# === Incremental API ===
+class PanelIndicatorState:
+    """
+    Carries EMA and rolling-window state for a fixed set of tickers, so that
+    `update(new_closes)` costs O(tickers) per bar instead of a full recompute.
+    """
+
+    def __init__(self, tickers, lookback=14, fast=8, slow=21):
+        self.tickers = list(tickers)
+        self.lookback = lookback
+        self.spans = {"EMA_Fast": fast, "EMA_Slow": slow, "EMA_12": 12, "EMA_26": 26, "MACD_Signal": 9}
+        n = len(self.tickers)
+        self.ema = {name: (np.full(n, np.nan), np.ones(n)) for name in self.spans}
+        self.last_close = np.full(n, np.nan)
+        # Last `lookback` gains/losses; NaNs propagate exactly like pandas rolling windows
+        self.gains = np.full((lookback, n), np.nan)
+        self.losses = np.full((lookback, n), np.nan)
+        self.latest = {}
+        self.previous = {}
+
+    @classmethod
+    def from_history(cls, close, lookback=14, fast=8, slow=21):
+        """Builds the state from a wide close panel (dates x tickers) in one pass."""
+        close = close.to_frame() if isinstance(close, pd.Series) else close
+        state = cls(close.columns, lookback, fast, slow)
+        values = _as_2d(close)
+
+        lines = {}
+        for name in ["EMA_Fast", "EMA_Slow", "EMA_12", "EMA_26"]:
+            lines[name], weighted, old_wt = _ema_scan(values, state.spans[name])
+            state.ema[name] = (weighted, old_wt)
+        lines["MACD"] = lines["EMA_12"] - lines["EMA_26"]
+        lines["MACD_Signal"], weighted, old_wt = _ema_scan(lines["MACD"], 9)
+        state.ema["MACD_Signal"] = (weighted, old_wt)
+
+        gain, loss = _gains_losses(values)
+        tail = min(lookback, len(values))
+        state.gains[lookback - tail:] = gain[len(values) - tail:]
+        state.losses[lookback - tail:] = loss[len(values) - tail:]
+
+        names = ["EMA_Fast", "EMA_Slow", "MACD", "MACD_Signal"]
+        if len(values):
+            state.last_close = values[-1].copy()
+            state.latest = {name: lines[name][-1] for name in names}
+            state.latest["RSI"] = _rsi_from_means(state.gains.mean(axis=0), state.losses.mean(axis=0))
+        if len(values) > 1:
+            state.previous = {name: lines[name][-2] for name in names}
+        return state
+
+    def update(self, new_close):
+        """
+        Feeds one bar of closes (Series indexed by ticker, or an array in ticker
+        order) and returns the updated indicators as {name: Series by ticker}.
+        """
+        if isinstance(new_close, pd.Series):
+            new_close = new_close.reindex(self.tickers)
+        row = np.asarray(new_close, dtype="float64")
+
+        for name in ["EMA_Fast", "EMA_Slow", "EMA_12", "EMA_26"]:
+            self.ema[name] = _ema_step(row, 2.0 / (self.spans[name] + 1.0), *self.ema[name])
+        macd_line = self.ema["EMA_12"][0] - self.ema["EMA_26"][0]
+        self.ema["MACD_Signal"] = _ema_step(macd_line, 2.0 / 10.0, *self.ema["MACD_Signal"])
+
+        delta = row - self.last_close
+        self.gains = np.vstack([self.gains[1:], np.clip(delta, 0, None)])
+        self.losses = np.vstack([self.losses[1:], -np.clip(delta, None, 0)])
+        self.last_close = row
+
+        self.previous = self.latest
+        self.latest = {
+            "EMA_Fast": self.ema["EMA_Fast"][0],
+            "EMA_Slow": self.ema["EMA_Slow"][0],
+            "MACD": macd_line,
+            "MACD_Signal": self.ema["MACD_Signal"][0],
+            "RSI": _rsi_from_means(self.gains.mean(axis=0), self.losses.mean(axis=0)),
+        }
+        return self.indicators()
+
+    def indicators(self):
+        return {name: pd.Series(values, index=self.tickers) for name, values in self.latest.items()}
+
+    def crossover_signals(self):
+        """BUY/SELL/HOLD per ticker for the MACD and EMA crossovers on the latest bar."""
+        signals = {}
+        for label, fast, slow in [("MACD", "MACD", "MACD_Signal"), ("EMA", "EMA_Fast", "EMA_Slow")]:
+            if not self.previous:
+                signals[label] = pd.Series("HOLD", index=self.tickers)
+                continue
+            panel = crossovers(
+                np.vstack([self.previous[fast], self.latest[fast]]),
+                np.vstack([self.previous[slow], self.latest[slow]]),
+            )
+            signals[label] = pd.Series(panel[-1], index=self.tickers)
+        return signals
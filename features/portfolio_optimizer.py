@@ -0,0 +1,278 @@
+# portfolio_optimizer.py
+# Mean-variance optimisation on precomputed moments: max-Sharpe, minimum variance and a
+# whole efficient frontier in one call.
+#
+# Moments are estimated once (estimate_moments); everything below works on (mu, cov) only.
+# The quadratic programs are solved by a warm-startable active-set method (solve_qp), with
+# SLSQP and analytic gradients as the fallback.
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+PERIODS_PER_YEAR = 252
+
+
+def estimate_moments(returns, periods_per_year=PERIODS_PER_YEAR, ridge=0.0):
+    """
+    Annualised mean vector and covariance matrix of a (dates x assets) returns
+    DataFrame. `ridge` adds that fraction of the average variance to the
+    diagonal, which keeps the matrix well conditioned for large universes.
+    """
+    values = returns.to_numpy(dtype="float64")
+    mu = values.mean(axis=0) * periods_per_year
+    cov = np.cov(values, rowvar=False, ddof=1) * periods_per_year
+    cov = np.atleast_2d(cov)
+    if ridge:
+        cov = cov + ridge * np.trace(cov) / len(cov) * np.eye(len(cov))
+    return pd.Series(mu, index=returns.columns), pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
+
+
+def portfolio_stats(weights, mu, cov, rf=0.0):
+    w = np.asarray(weights, dtype="float64")
+    ret = float(w @ np.asarray(mu))
+    vol = float(np.sqrt(max(w @ np.asarray(cov) @ w, 0.0)))
+    return {"return": ret, "volatility": vol, "sharpe": (ret - rf) / vol if vol > 0 else np.nan}
+
+
+def _arrays(mu, cov):
+    index = mu.index if isinstance(mu, pd.Series) else None
+    return np.asarray(mu, dtype="float64"), np.asarray(cov, dtype="float64"), index
+
+
+def _wrap(weights, index):
+    weights = np.where(np.abs(weights) < 1e-10, 0.0, weights)
+    return pd.Series(weights, index=index) if index is not None else weights
+
+
+def _budget_constraint(n):
+    ones = np.ones(n)
+    return {"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: ones}
+
+
+# === Box-constrained QP ===
+def solve_qp(Q, A, b, lower, upper, w0=None, max_iter=100, tol=1e-9, c=1.0):
+    """
+    min ½w'Qw  s.t.  Aw = b,  lower <= w <= upper, by a primal-dual active-set
+    method: each iteration fixes the variables predicted to sit on a bound and
+    solves the equality-constrained KKT system for the rest, so a solve costs a
+    handful of dense linear systems. `w0` (e.g. a neighbouring frontier point)
+    warm-starts the active set. Returns None when it fails to converge.
+    """
+    n = len(Q)
+    A = np.atleast_2d(A)
+    b = np.atleast_1d(np.asarray(b, dtype="float64"))
+    m = len(A)
+    if w0 is None:
+        at_lower = np.zeros(n, dtype=bool)
+        at_upper = np.zeros(n, dtype=bool)
+    else:
+        at_lower = w0 <= lower + tol
+        at_upper = (w0 >= upper - tol) & ~at_lower
+
+    for _ in range(max_iter):
+        free = ~(at_lower | at_upper)
+        w = np.where(at_lower, lower, np.where(at_upper, upper, 0.0))
+        k = int(free.sum())
+
+        kkt = np.zeros((k + m, k + m))
+        kkt[:k, :k] = Q[np.ix_(free, free)]
+        kkt[:k, k:] = A[:, free].T
+        kkt[k:, :k] = A[:, free]
+        rhs = np.concatenate([-Q[free] @ w, b - A @ w])
+        try:
+            solution = np.linalg.solve(kkt, rhs)
+        except np.linalg.LinAlgError:
+            return None
+        w[free] = solution[:k]
+        nu = solution[k:]
+
+        # Bound multipliers: gradient of the Lagrangian on fixed variables, zero on free ones.
+        # A variable is predicted active where multiplier + c * bound violation has the binding sign.
+        z = np.where(free, 0.0, Q @ w + A.T @ nu)
+        new_lower = z + c * (lower - w) > tol
+        new_upper = (z + c * (upper - w) < -tol) & ~new_lower
+        if np.array_equal(new_lower, at_lower) and np.array_equal(new_upper, at_upper):
+            return w
+        at_lower, at_upper = new_lower, new_upper
+    return None
+
+
+# === Max Sharpe ===
+def _neg_sharpe(excess, cov):
+    def objective(w):
+        ret, var = excess @ w, w @ cov @ w
+        vol = np.sqrt(var)
+        grad = -(excess * vol - ret * (cov @ w) / vol) / var
+        return -ret / vol, grad
+    return objective
+
+
+def max_sharpe(mu, cov, rf=0.0, bounds=(0.0, 1.0)):
+    """
+    Fully invested maximum Sharpe portfolio within per-asset `bounds`.
+
+    Long-only, this is first solved as the convex problem
+    min y'Σy s.t. (μ - rf)'y = 1, y >= 0, rescaled to w = y / Σy. If that breaks
+    the upper bound (or shorting is allowed), the Sharpe ratio is maximised
+    along the bounded efficient frontier instead (golden-section search over the
+    target return, each point warm-starting the next). SLSQP with an analytic
+    gradient is the fallback.
+    """
+    mu, cov, index = _arrays(mu, cov)
+    n = len(mu)
+    low, high = bounds
+    excess = mu - rf
+
+    w = None
+    if low == 0 and (excess > 0).any():
+        y = solve_qp(cov, excess, 1.0, np.zeros(n), np.full(n, np.inf))
+        if y is not None and y.sum() > 0 and y.max() / y.sum() <= high + 1e-9:
+            w = y / y.sum()
+    if w is None and n * low <= 1 <= n * high:
+        w = _frontier_max_sharpe(mu, cov, excess, np.full(n, float(low)), np.full(n, float(high)))
+
+    if w is None:
+        opt = minimize(
+            _neg_sharpe(excess, cov), np.full(n, 1.0 / n), jac=True, method="SLSQP",
+            bounds=[bounds] * n, constraints=[_budget_constraint(n)], options={"maxiter": 500, "ftol": 1e-12},
+        )
+        if not opt.success:
+            raise RuntimeError(f"Max-Sharpe optimisation failed: {opt.message}")
+        w = opt.x
+    return _wrap(w, index)
+
+
+def _frontier_max_sharpe(mu, cov, excess, lower, upper, iterations=60):
+    # The Sharpe ratio is unimodal in the target return along the frontier
+    w_min = _min_variance(mu, cov, None, lower, upper)
+    if w_min is None:
+        return None
+    a, c = mu @ w_min, _max_return(mu, lower, upper)
+    solved = {}
+    last = [w_min]
+
+    def sharpe_at(target):
+        if target not in solved:
+            w = _min_variance(mu, cov, target, lower, upper, last[0])
+            if w is None:
+                solved[target] = (-np.inf, None)
+            else:
+                solved[target] = ((excess @ w) / np.sqrt(w @ cov @ w), w)
+                last[0] = w
+        return solved[target][0]
+
+    ratio = (np.sqrt(5) - 1) / 2
+    x1, x2 = c - ratio * (c - a), a + ratio * (c - a)
+    for _ in range(iterations):
+        if c - a < 1e-8:
+            break
+        if sharpe_at(x1) >= sharpe_at(x2):
+            c, x2 = x2, x1
+            x1 = c - ratio * (c - a)
+        else:
+            a, x1 = x1, x2
+            x2 = a + ratio * (c - a)
+    return max(solved.values(), key=lambda v: v[0])[1] if solved else None
+
+
+# === Minimum variance / efficient frontier ===
+def _max_return(mu, lower, upper):
+    """Highest return reachable under the bounds: fill the best assets first."""
+    w = lower.copy()
+    budget = 1.0 - w.sum()
+    for i in np.argsort(mu)[::-1]:
+        add = min(upper[i] - w[i], budget)
+        w[i] += add
+        budget -= add
+        if budget <= 0:
+            break
+    return mu @ w
+
+
+def _min_variance(mu, cov, target, lower, upper, w0=None):
+    """Active-set solve with a SLSQP (analytic gradient) fallback; None if both fail."""
+    n = len(mu)
+    A = np.ones((1, n)) if target is None else np.vstack([np.ones(n), mu])
+    b = [1.0] if target is None else [1.0, target]
+    w = solve_qp(2.0 * cov, A, b, lower, upper, w0)
+    if w is not None:
+        return w
+
+    constraints = [_budget_constraint(n)]
+    if target is not None:
+        constraints.append({"type": "eq", "fun": lambda w: mu @ w - target, "jac": lambda w: mu})
+    opt = minimize(
+        lambda w: w @ cov @ w, np.full(n, 1.0 / n) if w0 is None else w0, jac=lambda w: 2.0 * cov @ w,
+        method="SLSQP", bounds=list(zip(lower, upper)), constraints=constraints,
+        options={"maxiter": 500, "ftol": 1e-12},
+    )
+    return opt.x if opt.success else None
+
+
+def min_variance(mu, cov, target_return=None, bounds=(0.0, 1.0)):
+    """Fully invested minimum-variance portfolio, optionally at a target annual return."""
+    mu, cov, index = _arrays(mu, cov)
+    n = len(mu)
+    w = _min_variance(mu, cov, target_return, np.full(n, float(bounds[0])), np.full(n, float(bounds[1])))
+    if w is None:
+        raise RuntimeError("Minimum-variance optimisation failed.")
+    return _wrap(w, index)
+
+
+def _unconstrained_frontier(mu, cov, targets):
+    """Closed form (budget constraint only, shorting allowed): w(t) = Σ⁻¹(λ(t)·1 + γ(t)·μ)."""
+    ones = np.ones(len(mu))
+    inv = np.linalg.solve(cov, np.column_stack([ones, mu]))
+    a, b, c = ones @ inv[:, 0], ones @ inv[:, 1], mu @ inv[:, 1]
+    det = a * c - b * b
+    lam = (c - b * targets) / det
+    gamma = (a * targets - b) / det
+    return np.outer(lam, inv[:, 0]) + np.outer(gamma, inv[:, 1])
+
+
+def efficient_frontier(mu, cov, n_points=50, targets=None, bounds=(0.0, 1.0), rf=0.0):
+    """
+    Minimum-variance portfolios for a grid of target returns, solved in one batch.
+
+    Without bounds (`bounds=None`) the whole frontier is a single closed-form
+    matrix expression. With bounds the targets are solved in ascending order,
+    each warm-started from the previous point's active set. Returns
+    (points, weights): one row per target with return/volatility/sharpe, and the
+    matching (targets x assets) weights.
+    """
+    mu, cov, index = _arrays(mu, cov)
+    n = len(mu)
+    if bounds is not None:
+        lower, upper = np.full(n, float(bounds[0])), np.full(n, float(bounds[1]))
+    if targets is None:
+        if bounds is None:
+            low, high = mu.min(), mu.max()
+        else:
+            # Reachable range under the bounds: from the min-variance return to the best fill
+            w_min = _min_variance(mu, cov, None, lower, upper)
+            low = mu @ w_min if w_min is not None else mu.min()
+            high = _max_return(mu, lower, upper)
+        targets = np.linspace(low, high, n_points)
+    targets = np.sort(np.asarray(targets, dtype="float64"))
+
+    if bounds is None:
+        weights = _unconstrained_frontier(mu, cov, targets)
+        solved = np.ones(len(targets), dtype=bool)
+    else:
+        weights = np.full((len(targets), n), np.nan)
+        solved = np.zeros(len(targets), dtype=bool)
+        w0 = None
+        for i, target in enumerate(targets):
+            w = _min_variance(mu, cov, target, lower, upper, w0)
+            if w is not None:
+                weights[i], solved[i] = w, True
+                w0 = w
+
+    weights = weights[solved]
+    rets = weights @ mu
+    vols = np.sqrt(np.clip(np.einsum("ij,jk,ik->i", weights, cov, weights), 0, None))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (rets - rf) / vols
+    points = pd.DataFrame({"target": targets[solved], "return": rets, "volatility": vols, "sharpe": sharpe})
+    return points, pd.DataFrame(np.where(np.abs(weights) < 1e-10, 0.0, weights), columns=index)
@@ -0,0 +1,151 @@
+# walk_forward.py
+# Walk-forward rebalancing backtest: re-optimises on a schedule over a rolling or expanding
+# window, using only data available at each rebalance date, with regime-aware sector tilts.
+
+import numpy as np
+import pandas as pd
+
+from features.portfolio_optimizer import max_sharpe, min_variance
+
+RISKY_SECTORS = ["Technology", "Financials", "Energy"]
+REGIME_TILTS = {"Bear": 0.5, "Bull": 1.2}
+FREQUENCIES = {"W": "W", "M": "M", "Q": "Q"}
+
+
+def apply_regime_tilt(weights, regime, sector_map, risky_sectors=RISKY_SECTORS, tilts=REGIME_TILTS):
+    """Scales risky-sector weights by the regime's tilt (Bear: 0.5, Bull: 1.2) and renormalises."""
+    factor = tilts.get(regime)
+    if factor is None or not sector_map:
+        return weights
+    risky = np.array([sector_map.get(t) in risky_sectors for t in weights.index])
+    tilted = weights.where(~risky, weights * factor)
+    total = tilted.sum()
+    return tilted / total if total > 0 else weights
+
+
+class RollingMoments:
+    """
+    Running sums of r and r r' over a window of return rows, so sliding the
+    window costs O(rows added/removed x assets²) instead of a full recompute.
+    """
+
+    def __init__(self, n_assets):
+        self.count = 0
+        self.sum = np.zeros(n_assets)
+        self.outer = np.zeros((n_assets, n_assets))
+
+    def add(self, rows):
+        rows = np.atleast_2d(rows)
+        self.count += len(rows)
+        self.sum += rows.sum(axis=0)
+        self.outer += rows.T @ rows
+
+    def remove(self, rows):
+        rows = np.atleast_2d(rows)
+        self.count -= len(rows)
+        self.sum -= rows.sum(axis=0)
+        self.outer -= rows.T @ rows
+
+    def mean(self):
+        return self.sum / self.count
+
+    def cov(self):
+        mean = self.mean()
+        return (self.outer - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+
+def rebalance_positions(index, frequency="M", start=0):
+    """Positions in `index` of the first bar of each week/month/quarter, from `start` on."""
+    periods = pd.DatetimeIndex(index).to_period(FREQUENCIES[frequency])
+    first = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return first[first >= start]
+
+
+def _regime(basket_close, end):
+    from models.ensemble import classify_market_regime
+    return classify_market_regime(basket_close.iloc[:end].to_frame("Close"))
+
+
+def walk_forward(returns, window=252, expanding=False, frequency="M", objective="max_sharpe",
+                 rf=0.0, bounds=(0.0, 1.0), sector_map=None, regime_tilt=True, cost_bps=0.0,
+                 periods_per_year=252):
+    """
+    Backtests a periodically re-optimised portfolio on a (dates x assets) returns
+    DataFrame. At each rebalance the optimiser sees only the `window` bars
+    before it (all earlier bars if `expanding`); weights then drift with prices
+    until the next rebalance, where `cost_bps` is charged on turnover.
+    Missing returns count as zero.
+
+    Returns {"returns": daily portfolio returns, "weights": target weights per
+    rebalance date, "regimes", "turnover", "stats"}.
+    """
+    values = returns.fillna(0.0).to_numpy(dtype="float64")
+    T, n = values.shape
+    assets = returns.columns
+    basket_close = pd.Series(np.cumprod(1.0 + values.mean(axis=1)), index=returns.index)
+    positions = list(rebalance_positions(returns.index, frequency, start=window))
+    moments = RollingMoments(n)
+    lo = hi = 0  # rows [lo, hi) are in the window
+
+    portfolio = np.zeros(T)
+    held = None
+    targets, regimes, turnover = {}, {}, {}
+    for k, pos in enumerate(positions):
+        # Slide the window to [pos - window, pos) (or [0, pos)), touching only the rows that changed
+        moments.add(values[hi:pos])
+        hi = pos
+        new_lo = 0 if expanding else pos - window
+        moments.remove(values[lo:new_lo])
+        lo = new_lo
+
+        mu = pd.Series(moments.mean() * periods_per_year, index=assets)
+        cov = pd.DataFrame(moments.cov() * periods_per_year, index=assets, columns=assets)
+        try:
+            if objective == "max_sharpe":
+                target = max_sharpe(mu, cov, rf=rf, bounds=bounds)
+            else:
+                target = min_variance(mu, cov, bounds=bounds)
+        except RuntimeError:
+            target = held if held is not None else pd.Series(1.0 / n, index=assets)
+        regime = _regime(basket_close, pos)
+        if regime_tilt:
+            target = apply_regime_tilt(target, regime, sector_map)
+
+        date = returns.index[pos]
+        targets[date], regimes[date] = target, regime
+        w = target.to_numpy()
+        turnover[date] = float(np.abs(w - (held.to_numpy() if held is not None else 0.0)).sum())
+
+        # Buy and hold until the next rebalance: asset values drift with their returns
+        end = positions[k + 1] if k + 1 < len(positions) else T
+        growth = np.cumprod(1.0 + values[pos:end], axis=0)
+        value = growth @ w
+        portfolio[pos:end] = np.diff(np.r_[1.0, value]) / np.r_[1.0, value[:-1]]
+        portfolio[pos] -= turnover[date] * cost_bps / 10000.0
+        drifted = w * growth[-1]
+        held = pd.Series(drifted / drifted.sum(), index=assets)
+
+    start = positions[0] if positions else T
+    port = pd.Series(portfolio[start:], index=returns.index[start:], name="Walk-Forward")
+    return {
+        "returns": port,
+        "weights": pd.DataFrame(targets).T,
+        "regimes": pd.Series(regimes, name="Regime"),
+        "turnover": pd.Series(turnover, name="Turnover"),
+        "stats": performance_stats(port, rf, periods_per_year),
+    }
+
+
+def performance_stats(returns, rf=0.0, periods_per_year=252):
+    if returns.empty:
+        return {}
+    equity = (1 + returns).cumprod()
+    years = len(returns) / periods_per_year
+    vol = returns.std() * np.sqrt(periods_per_year)
+    ann_ret = equity.iloc[-1] ** (1 / years) - 1 if years > 0 else np.nan
+    return {
+        "annual_return": float(ann_ret),
+        "volatility": float(vol),
+        "sharpe": float((returns.mean() * periods_per_year - rf) / vol) if vol > 0 else np.nan,
+        "max_drawdown": float((equity / equity.cummax() - 1).min()),
+    }
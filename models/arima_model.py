@@ -1,9 +1,54 @@
 import pandas as pd
 import numpy as np
+from datetime import datetime
 from statsmodels.tsa.arima.model import ARIMA
 from utils.common import fetch_price_data, preprocess_for_model, generate_signal_from_return
+from utils.telemetry import phase, note
+from models.model_state import (
+    load_state, save_state, series_anchor, new_observations, refit_due, llf_drifted, REFIT_DAYS
+)
 
-def forecast_arima(ticker, data, forecast_steps=5):
+ARIMA_ORDER = (1, 0, 1)
+
+def _fit_arima(diff_series):
+    # Fit on plain values so the results can later be extended with `append`
+    with phase("fit"):
+        model_fit = ARIMA(diff_series.values, order=ARIMA_ORDER).fit()
+    retvals = model_fit.mle_retvals or {}
+    note(n_iter=retvals.get("iterations"), converged=retvals.get("converged"))
+    state = series_anchor(diff_series)
+    state.update({
+        "results": model_fit,
+        "fit_date": datetime.now(),
+        "fit_n_obs": len(diff_series),
+        "llf_per_obs": float(model_fit.llf) / len(diff_series),
+    })
+    return state
+
+def _update_arima(ticker, diff_series, refit_days):
+    """Extends the stored fit with the new observations; refits when due or when the fit has drifted."""
+    state = load_state("arima", ticker)
+    n_new = new_observations(diff_series, state) if state is not None else None
+
+    if n_new is None or refit_due(state, refit_days):
+        state = _fit_arima(diff_series)
+    elif n_new > 0:
+        with phase("fit"):
+            results = state["results"].append(diff_series.values[-n_new:], refit=False)
+        note(n_iter=0)
+        since_fit = results.llf_obs[state["fit_n_obs"]:]
+        if llf_drifted(float(np.mean(since_fit)), len(since_fit), state):
+            state = _fit_arima(diff_series)
+        else:
+            state.update(series_anchor(diff_series))
+            state["results"] = results
+    else:
+        return state["results"]
+
+    save_state("arima", ticker, state)
+    return state["results"]
+
+def forecast_arima(ticker, data, forecast_steps=5, incremental=False, refit_days=REFIT_DAYS):
     try:
         series = preprocess_for_model(data, ticker, column='Close')
 
@@ -12,9 +57,12 @@ def forecast_arima(ticker, data, forecast_steps=5):
             return None, 'HOLD'
 
         diff_series = series.diff().dropna()
-        model = ARIMA(diff_series, order=(1, 0, 1))
-        model_fit = model.fit()
-        forecast = model_fit.forecast(steps=forecast_steps)
+        if incremental:
+            model_fit = _update_arima(ticker, diff_series, refit_days)
+        else:
+            model_fit = _fit_arima(diff_series)["results"]
+        with phase("predict"):
+            forecast = model_fit.forecast(steps=forecast_steps)
         total_forecast_return = forecast.sum()
 
         signal = generate_signal_from_return(total_forecast_return)
@@ -23,5 +71,6 @@ def forecast_arima(ticker, data, forecast_steps=5):
         return total_forecast_return, signal, abs(total_forecast_return)
 
     except Exception as e:
+        note(error=type(e).__name__)
         print(f"❌ ARIMA failed for {ticker}: {e}")
         return None, 'HOLD'
@@ -0,0 +1,129 @@
+# artifact_registry.py
+# On-disk store of trained model artifacts, keyed by ticker, model, hyperparameters and training data.
+
+import os
+import io
+import json
+import time
+import hashlib
+import numpy as np
+
+from utils.helpers import load_section
+
+REGISTRY_DIR = os.environ.get("ARTIFACT_DIR", "data/artifacts")
+
+# Defaults, overridable through the "artifacts" section of config/config.json
+MAX_MB = 512
+MAX_AGE_DAYS = 7
+# A save runs eviction once this much has been written since the last pass
+EVICT_EVERY_MB = 64
+
+_SETTINGS = None
+_written_since_evict = 0
+
+
+def _settings():
+    # Read once per process: load and save run for every model of every ticker
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = load_section(
+            "artifacts", {"max_mb": MAX_MB, "max_age_days": MAX_AGE_DAYS, "evict_every_mb": EVICT_EVERY_MB}
+        )
+    return _SETTINGS
+
+
+def data_digest(df, column="Close"):
+    """Hash of the training window: timestamps and values of `column`."""
+    series = df[column].dropna()
+    h = hashlib.sha1()
+    h.update(np.asarray(series.index.asi8 if hasattr(series.index, "asi8") else series.index).tobytes())
+    h.update(np.ascontiguousarray(series.to_numpy(dtype="float64")).tobytes())
+    return h.hexdigest()
+
+
+def make_key(ticker, model, params, digest):
+    payload = json.dumps({"ticker": ticker, "model": model, "params": params, "data": digest}, sort_keys=True, default=str)
+    return f"{model}-{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+def _paths(key):
+    base = os.path.join(REGISTRY_DIR, key)
+    return base + ".bin", base + ".json"
+
+
+def load_artifact(key, max_age_days=None):
+    """Returns the stored bytes for `key`, or None if missing or older than `max_age_days`."""
+    blob_path, meta_path = _paths(key)
+    max_age_days = _settings()["max_age_days"] if max_age_days is None else max_age_days
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if time.time() - meta["created"] > max_age_days * 86400:
+            return None
+        with open(blob_path, "rb") as f:
+            blob = f.read()
+        # Access time drives LRU eviction
+        os.utime(blob_path)
+        return blob
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_artifact(key, blob, **meta):
+    global _written_since_evict
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    blob_path, meta_path = _paths(key)
+    meta["created"] = time.time()
+    meta["size"] = len(blob)
+    # Write-then-rename: concurrent scan workers never read a partial artifact
+    with open(blob_path + ".tmp", "wb") as f:
+        f.write(blob)
+    os.replace(blob_path + ".tmp", blob_path)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    # Listing the registry costs a stat per artifact, so evict in batches, not per save
+    _written_since_evict += len(blob)
+    if _written_since_evict > _settings()["evict_every_mb"] * 1024 * 1024:
+        evict()
+
+
+def evict(max_mb=None):
+    """Deletes least-recently-used artifacts until the registry fits its disk budget."""
+    global _written_since_evict
+    _written_since_evict = 0
+    if not os.path.isdir(REGISTRY_DIR):
+        return
+    budget = (_settings()["max_mb"] if max_mb is None else max_mb) * 1024 * 1024
+    entries = []
+    for name in os.listdir(REGISTRY_DIR):
+        if not name.endswith(".bin"):
+            continue
+        try:
+            stat = os.stat(os.path.join(REGISTRY_DIR, name))
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name[:-4]))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, key in sorted(entries):
+        if total <= budget:
+            break
+        for path in _paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= size
+
+
+# === Serialization helpers ===
+def arrays_to_bytes(arrays):
+    buffer = io.BytesIO()
+    np.savez(buffer, *arrays)
+    return buffer.getvalue()
+
+
+def bytes_to_arrays(blob):
+    with np.load(io.BytesIO(blob)) as data:
+        return [data[f"arr_{i}"] for i in range(len(data.files))]
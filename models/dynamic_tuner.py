@@ -1,59 +1,23 @@
-import json
-import os
+from models.performance_store import (
+    load_weights, record_outcomes, tune_weights, DEFAULT_WEIGHTS
+)
 
-TUNING_FILE = "data/model_performance.json"
+# Outcomes, accuracy counts and weights live in the shared store (data/model_performance.db);
+# data/model_performance.json is imported into it once on first use.
 
 def load_model_weights():
-    if not os.path.exists(TUNING_FILE):
-        return {
-            "ARIMA": 1.0,
-            "GARCH": 1.0,
-            "HMM": 1.0,
-            "LSTM": 1.0,
-            "XGBoost": 1.0
-        }
-
-    with open(TUNING_FILE, "r") as f:
-        data = json.load(f)
-        return data.get("weights", {})
+    return load_weights(DEFAULT_WEIGHTS)
 
 def update_model_accuracy(model_name, is_correct):
-    if not os.path.exists(TUNING_FILE):
-        history = {"accuracies": {}, "weights": {}}
-    else:
-        with open(TUNING_FILE, "r") as f:
-            history = json.load(f)
-
-    history.setdefault("accuracies", {}).setdefault(model_name, {"correct": 0, "total": 0})
-    record = history["accuracies"][model_name]
-    record["total"] += 1
-    if is_correct:
-        record["correct"] += 1
+    # Updates that model's running accuracy and weight in the same transaction
+    record_outcomes([{"model": model_name, "correct": is_correct}])
 
-    # Update weight
-    accuracy = record["correct"] / max(1, record["total"])
-    weight = round(0.5 + 1.5 * accuracy, 2)
-    history.setdefault("weights", {})[model_name] = weight
-
-    with open(TUNING_FILE, "w") as f:
-        json.dump(history, f, indent=2)
+def update_model_accuracies(outcomes):
+    """Batched form of update_model_accuracy: an iterable of (model_name, is_correct) or outcome dicts."""
+    record_outcomes(
+        outcome if isinstance(outcome, dict) else {"model": outcome[0], "correct": outcome[1]}
+        for outcome in outcomes
+    )
 
 def tune_model_weights():
-    if not os.path.exists(TUNING_FILE):
-        return load_model_weights()
-
-    with open(TUNING_FILE, "r") as f:
-        history = json.load(f)
-
-    accuracies = history.get("accuracies", {})
-    new_weights = {}
-    for model, record in accuracies.items():
-        accuracy = record["correct"] / max(1, record["total"])
-        new_weights[model] = round(0.5 + 1.5 * accuracy, 2)
-
-    history["weights"] = new_weights
-
-    with open(TUNING_FILE, "w") as f:
-        json.dump(history, f, indent=2)
-
-    return new_weights
+    return tune_weights()
@@ -1,5 +1,6 @@
 # ensemble.py (patched)
 import sys, os
+import importlib
 import numpy as np
 import pandas as pd
 from datetime import datetime
@@ -7,27 +8,51 @@ from collections import Counter
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from models.arima_model import forecast_arima
-from models.garch_model import forecast_garch
-from models.hmm_model import forecast_hmm
-from models.lstm_model import forecast_lstm
-from models.ml_models import forecast_ml
 from models.dynamic_tuner import load_model_weights
-from utils.common import fetch_price_data
-
-MODEL_WEIGHTS = load_model_weights()
-
-def classify_market_regime(df):
-    df = df.copy()
-    df["return"] = df["Close"].pct_change()
-    recent_return = df["return"].iloc[-20:].mean()
-
+from utils.telemetry import track
+
+# === Lazy model registry ===
+# Backends (statsmodels, arch, hmmlearn, TensorFlow, xgboost) are imported the first
+# time a model runs, so pages that only need classify_market_regime stay cheap to load.
+MODEL_BACKENDS = {
+    "ARIMA": ("models.arima_model", "forecast_arima"),
+    "GARCH": ("models.garch_model", "forecast_garch"),
+    "HMM": ("models.hmm_model", "forecast_hmm"),
+    "LSTM": ("models.lstm_model", "forecast_lstm"),
+    "LSTM_GLOBAL": ("models.lstm_model", "predict_global_lstm"),
+    "XGBoost": ("models.ml_models", "forecast_ml"),
+}
+_LOADED_MODELS = {}
+
+def get_model(name):
+    if name not in _LOADED_MODELS:
+        module_name, attr = MODEL_BACKENDS[name]
+        _LOADED_MODELS[name] = getattr(importlib.import_module(module_name), attr)
+    return _LOADED_MODELS[name]
+
+def __getattr__(name):
+    # Weights are read on demand rather than at import; kept for callers of the old constant
+    if name == "MODEL_WEIGHTS":
+        return load_model_weights()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def regime_from_return(recent_return):
+    """Regime label for the mean return of the last 20 bars."""
     if recent_return > 0.05:
         return "Bull"
     elif recent_return < -0.05:
         return "Bear"
-    else:
-        return "Neutral"
+    return "Neutral"
+
+def classify_market_regime(df, macro_features=None):
+    regime = regime_from_return(df["Close"].pct_change().iloc[-20:].mean())
+
+    # Point-in-time macro matrix (features.macro_features): a risk-off backdrop downgrades one step
+    if macro_features is not None and len(df):
+        from features.macro_features import align_macro, macro_risk_off
+        if macro_risk_off(align_macro(macro_features, df.index[-1:]).iloc[-1]):
+            regime = {"Bull": "Neutral", "Neutral": "Bear"}.get(regime, regime)
+    return regime
 
 def clean_signal(signal):
     if isinstance(signal, str) and signal in {"BUY", "SELL", "HOLD"}:
@@ -38,14 +63,20 @@ def clean_signal(signal):
                 return item
     return "ERROR"
 
-def generate_forecast_ensemble(df, horizon="1 Week"):
+def generate_forecast_ensemble(df, horizon="1 Week", lstm_model=None):
+    # lstm_model: optional global LSTM from models.lstm_model.fit_global_lstm, used instead of a per-call fit
     forecast_days = {"1 Day": 1, "1 Week": 5, "1 Month": 21}.get(horizon, 5)
 
     model_votes = {}
     confidence_scores = {}
+    # One utils.telemetry record per model call (timings, iterations, convergence, error class)
+    telemetry = []
+    n_obs = len(df)
 
     try:
-        pred, signal, conf = forecast_arima("TICKER", df, forecast_days)
+        with track("ARIMA", n_obs=n_obs) as record:
+            telemetry.append(record)
+            pred, signal, conf = get_model("ARIMA")("TICKER", df, forecast_days)
         model_votes["ARIMA"] = clean_signal(signal)
         confidence_scores["ARIMA"] = conf
     except Exception:
@@ -53,7 +84,9 @@ def generate_forecast_ensemble(df, horizon="1 Week"):
         confidence_scores["ARIMA"] = 0
 
     try:
-        signal = forecast_garch(df, forecast_days)
+        with track("GARCH", n_obs=n_obs) as record:
+            telemetry.append(record)
+            signal = get_model("GARCH")(df, forecast_days)
         model_votes["GARCH"] = clean_signal(signal)
         confidence_scores["GARCH"] = 1
     except Exception:
@@ -61,7 +94,9 @@ def generate_forecast_ensemble(df, horizon="1 Week"):
         confidence_scores["GARCH"] = 0
 
     try:
-        pred, signal, conf = forecast_hmm("TICKER", df, forecast_days)
+        with track("HMM", n_obs=n_obs) as record:
+            telemetry.append(record)
+            pred, signal, conf = get_model("HMM")("TICKER", df, forecast_days)
         model_votes["HMM"] = clean_signal(signal)
         confidence_scores["HMM"] = conf
     except Exception:
@@ -69,7 +104,12 @@ def generate_forecast_ensemble(df, horizon="1 Week"):
         confidence_scores["HMM"] = 0
 
     try:
-        pred, signal, conf = forecast_lstm("TICKER", df, forecast_days)
+        with track("LSTM", n_obs=n_obs) as record:
+            telemetry.append(record)
+            if lstm_model is not None:
+                pred, signal, conf = get_model("LSTM_GLOBAL")(lstm_model, {"TICKER": df})["TICKER"]
+            else:
+                pred, signal, conf = get_model("LSTM")("TICKER", df, forecast_days)
         model_votes["LSTM"] = clean_signal(signal)
         confidence_scores["LSTM"] = conf
     except Exception:
@@ -77,17 +117,20 @@ def generate_forecast_ensemble(df, horizon="1 Week"):
         confidence_scores["LSTM"] = 0
 
     try:
-        pred, signal, conf = forecast_ml(df, forecast_days)
+        with track("XGBoost", n_obs=n_obs) as record:
+            telemetry.append(record)
+            pred, signal, conf = get_model("XGBoost")(df, forecast_days)
         model_votes["XGBoost"] = clean_signal(signal)
         confidence_scores["XGBoost"] = conf
     except Exception:
         model_votes["XGBoost"] = "ERROR"
         confidence_scores["XGBoost"] = 0
 
+    model_weights = load_model_weights()
     votes = {"BUY": 0, "SELL": 0, "HOLD": 0}
     for model, signal in model_votes.items():
         if signal in votes:
-            w = MODEL_WEIGHTS.get(model, 1.0)
+            w = model_weights.get(model, 1.0)
             c = confidence_scores.get(model, 1.0)
             votes[signal] += w * c
 
@@ -111,5 +154,6 @@ def generate_forecast_ensemble(df, horizon="1 Week"):
         "forecast_table": forecast_table,
         "final_signal": final_signal,
         "rationale": rationale,
-        "model_confidences": confidence_scores
+        "model_confidences": confidence_scores,
+        "telemetry": telemetry
     }
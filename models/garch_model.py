@@ -1,17 +1,89 @@
+import zlib
+import numpy as np
 import pandas as pd
+from datetime import datetime, timedelta
 from arch import arch_model
+from utils.telemetry import phase, note
+from utils.scan_engine import run_parallel
+from models.model_state import (
+    load_state, save_state, series_anchor, new_observations, refit_due, llf_drifted, REFIT_DAYS
+)
 
-def forecast_garch(df, forecast_days=5):
-    returns = 100 * df["Close"].pct_change().dropna()
+PERIODS_PER_YEAR = 252
 
-    model = arch_model(returns, vol='Garch', p=1, q=1)
-    fitted_model = model.fit(disp="off")
+def _note_fit(fitted_model):
+    result = fitted_model.optimization_result
+    note(n_iter=getattr(result, "nit", None), converged=fitted_model.convergence_flag == 0)
 
-    forecast = fitted_model.forecast(horizon=forecast_days)
-    mean_forecast = forecast.mean.iloc[-1].values[-1]  # scalar value
+def _fit_garch(returns):
+    with phase("fit"):
+        fitted_model = arch_model(returns, vol='Garch', p=1, q=1).fit(disp="off")
+    _note_fit(fitted_model)
+    state = series_anchor(returns)
+    state.update({
+        "params": fitted_model.params,
+        "fit_date": datetime.now(),
+        "fit_n_obs": len(returns),
+        "fit_llf": float(fitted_model.loglikelihood),
+        "llf_per_obs": float(fitted_model.loglikelihood) / len(returns),
+        # Where the variance recursion stands, so new bars can be filtered without arch
+        "last_var": float(fitted_model.conditional_volatility.iloc[-1] ** 2),
+        "last_resid": float(fitted_model.resid.iloc[-1]),
+        "llf_since_fit": 0.0,
+    })
+    return fitted_model, state
+
+def _staggered_fit_date(ticker, refit_days, now=None):
+    """
+    Backdates a fit to the ticker's own day of the refit cycle, so scheduled
+    refits are spread over refit_days instead of all coming due on one day.
+    """
+    now = now or datetime.now()
+    offset = (now.toordinal() + zlib.crc32(ticker.encode())) % max(int(refit_days), 1)
+    return now - timedelta(days=offset)
+
+def _refit_state(item):
+    """Worker entry point for the panel's MLE refits: (ticker, returns, refit_days) -> state."""
+    ticker, returns, refit_days = item
+    _, state = _fit_garch(returns)
+    state["fit_date"] = _staggered_fit_date(ticker, refit_days)
+    return state
+
+def _param_array(states):
+    """(n_tickers x 4) array of mu, omega, alpha, beta."""
+    return np.array([
+        [s["params"]["mu"], s["params"]["omega"], s["params"]["alpha[1]"], s["params"]["beta[1]"]] for s in states
+    ])
+
+def _filter_panel(params, last_var, last_resid, new_returns):
+    """
+    Runs the GARCH(1,1) variance recursion over a (bars x tickers) block of new
+    percent returns for all tickers at once; NaN entries (tickers with fewer new
+    bars) leave that ticker's state untouched. Returns the updated (last_var,
+    last_resid) and each ticker's Gaussian log-likelihood of its new bars.
+    """
+    mu, omega, alpha, beta = params.T
+    var, resid = last_var.copy(), last_resid.copy()
+    llf = np.zeros(len(mu))
+    for row in new_returns:
+        present = ~np.isnan(row)
+        step_var = omega + alpha * resid ** 2 + beta * var
+        step_resid = row - mu
+        llf += np.where(present, -0.5 * (np.log(2 * np.pi) + np.log(step_var) + step_resid ** 2 / step_var), 0.0)
+        var = np.where(present, step_var, var)
+        resid = np.where(present, step_resid, resid)
+    return var, resid, llf
 
-    current_price = df["Close"].iloc[-1]
+def _forecast_panel(params, last_var, last_resid, horizon):
+    """(tickers x horizon) expected conditional variances for the next `horizon` bars."""
+    _, omega, alpha, beta = params.T
+    variance = np.empty((len(params), horizon))
+    variance[:, 0] = omega + alpha * last_resid ** 2 + beta * last_var
+    for h in range(1, horizon):
+        variance[:, h] = omega + (alpha + beta) * variance[:, h - 1]
+    return variance
 
+def _signal(mean_forecast):
     # Use percentage return to determine direction
     if mean_forecast > 0:
         return "BUY"
@@ -19,3 +91,125 @@ def forecast_garch(df, forecast_days=5):
         return "SELL"
     else:
         return "HOLD"
+
+def forecast_garch_panel(frames, forecast_days=5, refit_days=REFIT_DAYS, workers=1, chunk_size=1):
+    """
+    Fast-path GARCH(1,1) for a whole universe ({ticker: OHLCV DataFrame}).
+
+    Each ticker's parameters are kept in model_state; the bars added since the
+    last call are pushed through the variance recursion for all tickers at once
+    in NumPy, and the multi-step variance forecast is a closed-form recursion.
+    The full arch MLE only runs for tickers without a usable state, when the
+    refit schedule is due or when the new bars fit clearly worse (log-likelihood
+    drift). Those refits are spread over `workers` processes, and each ticker's
+    schedule is staggered so only about 1/refit_days of the universe is due on
+    any one day.
+
+    Returns {ticker: {"mean", "signal", "variance", "volatility", "horizon_vol"}}:
+    the per-bar mean forecast (%), its signal, the per-bar conditional variance
+    term structure (%²), the same as annualised volatility, and the volatility
+    of the cumulative return over 1..forecast_days bars (both as fractions).
+    """
+    series, states, n_new = {}, {}, {}
+    refit = []
+    for ticker, df in frames.items():
+        if df is None or "Close" not in df or len(df) < 30:
+            continue
+        returns = 100 * df["Close"].pct_change().dropna()
+        series[ticker] = returns
+        state = load_state("garch", ticker)
+        new = new_observations(returns, state) if state is not None else None
+        if new is None or "last_var" not in state or refit_due(state, refit_days):
+            refit.append(ticker)
+        else:
+            states[ticker], n_new[ticker] = state, new
+
+    # === Vectorised filter over the new bars ===
+    filtered = [t for t in states if n_new[t] > 0]
+    if filtered:
+        depth = max(n_new[t] for t in filtered)
+        block = np.full((depth, len(filtered)), np.nan)
+        for j, t in enumerate(filtered):
+            block[depth - n_new[t]:, j] = series[t].to_numpy()[-n_new[t]:]
+        with phase("fit"):
+            var, resid, llf = _filter_panel(
+                _param_array([states[t] for t in filtered]),
+                np.array([states[t]["last_var"] for t in filtered]),
+                np.array([states[t]["last_resid"] for t in filtered]),
+                block,
+            )
+        note(n_iter=0)
+        for j, t in enumerate(filtered):
+            state = states[t]
+            llf_since_fit = state["llf_since_fit"] + llf[j]
+            since_fit = len(series[t]) - state["fit_n_obs"]
+            if llf_drifted(llf_since_fit / since_fit, since_fit, state):
+                refit.append(t)
+                del states[t]
+                continue
+            state.update(series_anchor(series[t]))
+            state.update({"last_var": float(var[j]), "last_resid": float(resid[j]), "llf_since_fit": llf_since_fit})
+            save_state("garch", t, state)
+
+    # === Scheduled / drift-triggered MLE refits ===
+    items = [(t, series[t], refit_days) for t in refit]
+    for _, (t, _, _), state, error in run_parallel(_refit_state, items, workers, chunk_size):
+        if error is not None:
+            print(f"❌ GARCH fit failed for {t}: {error}")
+            continue
+        save_state("garch", t, state)
+        states[t] = state
+
+    if not states:
+        return {}
+    tickers = list(states)
+    params = _param_array([states[t] for t in tickers])
+    with phase("predict"):
+        variance = _forecast_panel(
+            params,
+            np.array([states[t]["last_var"] for t in tickers]),
+            np.array([states[t]["last_resid"] for t in tickers]),
+            forecast_days,
+        )
+    volatility = np.sqrt(variance * PERIODS_PER_YEAR) / 100
+    horizon_vol = np.sqrt(np.cumsum(variance, axis=1)) / 100
+    return {
+        t: {
+            "mean": float(params[j, 0]),
+            "signal": _signal(params[j, 0]),
+            "variance": variance[j],
+            "volatility": volatility[j],
+            "horizon_vol": horizon_vol[j],
+        }
+        for j, t in enumerate(tickers)
+    }
+
+def _panel_one(df, ticker, forecast_days, refit_days):
+    result = forecast_garch_panel({ticker: df}, forecast_days, refit_days).get(ticker)
+    if result is None:
+        raise ValueError(f"No GARCH fit for {ticker}")
+    return result
+
+def garch_term_structure(df, forecast_days=5, ticker=None, incremental=False, refit_days=REFIT_DAYS):
+    """Annualised conditional volatility for each of the next `forecast_days` bars, as a Series indexed 1..h."""
+    if incremental and ticker is not None:
+        volatility = _panel_one(df, ticker, forecast_days, refit_days)["volatility"]
+    else:
+        fitted_model, _ = _fit_garch(100 * df["Close"].pct_change().dropna())
+        variance = fitted_model.forecast(horizon=forecast_days).variance.iloc[-1].to_numpy()
+        volatility = np.sqrt(variance * PERIODS_PER_YEAR) / 100
+    return pd.Series(volatility, index=pd.RangeIndex(1, forecast_days + 1, name="horizon"), name="volatility")
+
+def forecast_garch(df, forecast_days=5, ticker=None, incremental=False, refit_days=REFIT_DAYS):
+    if incremental and ticker is not None:
+        # Stored parameters and a NumPy variance filter; arch only refits on schedule or drift
+        return _panel_one(df, ticker, forecast_days, refit_days)["signal"]
+
+    returns = 100 * df["Close"].pct_change().dropna()
+    fitted_model, _ = _fit_garch(returns)
+
+    with phase("predict"):
+        forecast = fitted_model.forecast(horizon=forecast_days)
+    mean_forecast = forecast.mean.iloc[-1].values[-1]  # scalar value
+
+    return _signal(mean_forecast)
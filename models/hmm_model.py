@@ -1,26 +1,170 @@
-def forecast_hmm(ticker, data, forecast_steps=5):
-    import numpy as np
+import numpy as np
+from datetime import datetime
+from utils.telemetry import phase, note
+from models.model_state import (
+    load_state, save_state, series_anchor, new_observations, refit_due, llf_drifted, REFIT_DAYS
+)
+
+N_STATES = 3
+N_ITER = 100
+WARM_TOL = 1e-2  # EM log-likelihood gain at which a warm-started fit stops (hmmlearn default)
+# Fit on percent returns like GARCH: raw daily variances (~1e-4) sit below hmmlearn's
+# min_covar and make EM collapse to NaN for a good share of initialisations
+SCALE = 100
+
+def _hmm_to_arrays(model):
+    return [model.startprob_, model.transmat_, model.means_, model.covars_]
+
+def _hmm_from_arrays(arrays, n_components=N_STATES, **kwargs):
+    from hmmlearn.hmm import GaussianHMM
+
+    startprob, transmat, means, covars = arrays
+    model = GaussianHMM(n_components=n_components, covariance_type="full", **kwargs)
+    model.n_features = means.shape[1]
+    model.startprob_, model.transmat_, model.means_, model.covars_ = startprob, transmat, means, covars
+    return model
+
+def _sort_states(model):
+    """Relabels the states by ascending mean return (0 = most bearish), so labels stay stable across fits."""
+    order = np.argsort(model.means_[:, 0])
+    if (order == np.arange(len(order))).all():
+        return model
+    model.startprob_ = model.startprob_[order]
+    model.transmat_ = model.transmat_[np.ix_(order, order)]
+    model.means_ = model.means_[order]
+    model.covars_ = model.covars_[order]
+    return model
+
+def _log_emissions(model, X):
+    """(n_obs x n_states) Gaussian log-densities of the observations under each state."""
+    out = np.empty((len(X), model.n_components))
+    for k in range(model.n_components):
+        cov = model.covars_[k]
+        _, logdet = np.linalg.slogdet(cov)
+        diff = X - model.means_[k]
+        maha = np.einsum("ij,ij->i", diff, np.linalg.solve(cov, diff.T).T)
+        out[:, k] = -0.5 * (X.shape[1] * np.log(2 * np.pi) + logdet + maha)
+    return out
+
+def _forward_filter(model, X, state_prob):
+    """
+    Advances the filtered state probabilities over the new observations X.
+    Returns (state_prob, total log-likelihood of X given the past).
+    """
+    log_b = _log_emissions(model, X)
+    llf = 0.0
+    for t in range(len(X)):
+        shift = log_b[t].max()
+        alpha = (state_prob @ model.transmat_) * np.exp(log_b[t] - shift)
+        total = alpha.sum()
+        state_prob = alpha / total
+        llf += np.log(total) + shift
+    return state_prob, llf
+
+def _fit_hmm(returns, previous=None, tol=WARM_TOL):
+    """
+    EM fit of the 3-state model. With `previous` parameters EM starts from them
+    and stops at `tol`; otherwise it starts from the usual k-means initialisation.
+    """
     from hmmlearn.hmm import GaussianHMM
+
+    if previous is not None:
+        model = _hmm_from_arrays(previous, n_iter=N_ITER, tol=tol, init_params="")
+    else:
+        model = GaussianHMM(n_components=N_STATES, covariance_type="full", n_iter=N_ITER, random_state=0)
+    with phase("fit"):
+        model.fit(returns)
+    note(n_iter=model.monitor_.iter, converged=bool(model.monitor_.converged))
+    return _sort_states(model)
+
+def _hmm_state(model, ret_series):
+    # The last smoothed posterior is the filtered probability of today's state
+    with phase("predict"):
+        llf, posteriors = model.score_samples(ret_series.values.reshape(-1, 1))
+    state = series_anchor(ret_series)
+    state.update({
+        "params": _hmm_to_arrays(model),
+        "state_prob": posteriors[-1],
+        "fit_date": datetime.now(),
+        "fit_n_obs": len(ret_series),
+        "llf_since_fit": 0.0,
+        "llf_per_obs": float(llf) / len(ret_series),
+    })
+    return state
+
+def _update_hmm(ticker, ret_series, refit_days, tol):
+    """
+    Forward-filters the new bars with the stored parameters. When a refit is due
+    (or the fit has drifted, or the history changed) EM is warm-started from the
+    stored parameters instead of from scratch.
+    """
+    state = load_state("hmm", ticker)
+    n_new = new_observations(ret_series, state) if state is not None else None
+    previous = state["params"] if state is not None else None
+
+    if n_new is not None and not refit_due(state, refit_days):
+        if n_new == 0:
+            return _hmm_from_arrays(state["params"]), state["state_prob"]
+        model = _hmm_from_arrays(state["params"])
+        with phase("predict"):
+            state_prob, llf = _forward_filter(model, ret_series.values[-n_new:].reshape(-1, 1), state["state_prob"])
+        note(n_iter=0)
+        llf_since_fit = state["llf_since_fit"] + llf
+        since_fit = len(ret_series) - state["fit_n_obs"]
+        if not llf_drifted(llf_since_fit / since_fit, since_fit, state):
+            state.update(series_anchor(ret_series))
+            state.update({"state_prob": state_prob, "llf_since_fit": llf_since_fit})
+            save_state("hmm", ticker, state)
+            return model, state_prob
+
+    model = _fit_hmm(ret_series.values.reshape(-1, 1), previous, tol)
+    state = _hmm_state(model, ret_series)
+    save_state("hmm", ticker, state)
+    return model, state["state_prob"]
+
+def forecast_hmm(ticker, data, forecast_steps=5, use_registry=True, incremental=False,
+                 refit_days=REFIT_DAYS, tol=WARM_TOL):
     from utils.common import preprocess_for_model, generate_signal_from_return
+    from models.artifact_registry import (
+        make_key, data_digest, load_artifact, save_artifact, arrays_to_bytes, bytes_to_arrays
+    )
 
     try:
         series = preprocess_for_model(data, ticker, column='Close')
-        returns = series.pct_change().dropna().values.reshape(-1, 1)
+        ret_series = SCALE * series.pct_change().dropna()
+        returns = ret_series.values.reshape(-1, 1)
 
         if len(returns) < 50:
             return 0.0, "HOLD", 0.0
 
-        model = GaussianHMM(n_components=3, covariance_type="full", n_iter=100)
-        model.fit(returns)
+        if incremental:
+            model, state_prob = _update_hmm(ticker, ret_series, refit_days, tol)
+            last_state = int(np.argmax(state_prob))
+        else:
+            key = None
+            if use_registry:
+                params = {"n_components": N_STATES, "covariance_type": "full", "n_iter": N_ITER, "scale": SCALE}
+                key = make_key(ticker, "hmm", params, data_digest(data))
+
+            blob = load_artifact(key) if key is not None else None
+            if blob is not None:
+                model = _hmm_from_arrays(bytes_to_arrays(blob))
+            else:
+                model = _fit_hmm(returns)
 
-        last_state = model.predict(returns)[-1]
-        expected_return = model.means_.flatten()[last_state] * forecast_steps * 100
+            with phase("predict"):
+                last_state = model.predict(returns)[-1]
+            if blob is None and key is not None:
+                # Only a fit that could decode the series is worth keeping
+                save_artifact(key, arrays_to_bytes(_hmm_to_arrays(model)), ticker=ticker, model="hmm")
+        expected_return = model.means_.flatten()[last_state] * forecast_steps * 100 / SCALE
         signal = generate_signal_from_return(expected_return / 100)
         confidence = min(abs(expected_return) / 10, 1)
 
-        print(f"[HMM] Expected return: {expected_return:.4f}, Confidence: {confidence:.2f}, Signal: {signal}")
+        print(f"[HMM] State {last_state}, Expected return: {expected_return:.4f}, Confidence: {confidence:.2f}, Signal: {signal}")
         return expected_return / 100, signal, confidence
 
     except Exception as e:
+        note(error=type(e).__name__)
         print(f"[HMM ERROR] {e}")
         return 0.0, "HOLD", 0.0
@@ -1,21 +1,58 @@
-def forecast_lstm(ticker, df, forecast_days=5):
-    import numpy as np
-    import pandas as pd
-    from sklearn.preprocessing import MinMaxScaler
+LOOK_BACK = 60
+
+def _build_lstm(look_back, units=50):
     from tensorflow.keras.models import Sequential
     from tensorflow.keras.layers import LSTM, Dense
     from tensorflow.keras.layers import Input
 
+    model = Sequential()
+    model.add(Input(shape=(look_back, 1)))
+    model.add(LSTM(units=units, return_sequences=False))
+    model.add(Dense(1))
+    model.compile(optimizer="adam", loss="mean_squared_error")
+    return model
+
+def _to_signal(pct_return):
+    if abs(pct_return) < 0.0005:
+        return 0.0, "HOLD", 0.0
+
+    signal = "BUY" if pct_return > 0 else "SELL"
+    confidence = min(abs(pct_return) * 10, 1)
+    return pct_return, signal, confidence
+
+def _load_or_fit(network, key, fit, **meta):
+    """Restores weights from the artifact registry when `key` is stored, otherwise trains and stores them."""
+    from models.artifact_registry import load_artifact, save_artifact, arrays_to_bytes, bytes_to_arrays
+    from utils.telemetry import phase, note
+
+    blob = load_artifact(key) if key is not None else None
+    if blob is not None:
+        network.set_weights(bytes_to_arrays(blob))
+        return network
+    with phase("fit"):
+        history = fit(network)
+    note(n_iter=len(history.epoch) if history is not None else None)
+    if key is not None:
+        save_artifact(key, arrays_to_bytes(network.get_weights()), **meta)
+    return network
+
+def forecast_lstm(ticker, df, forecast_days=5, use_registry=True):
+    import numpy as np
+    import pandas as pd
+    from sklearn.preprocessing import MinMaxScaler
+    from models.artifact_registry import make_key, data_digest
+    from utils.telemetry import phase
+
     # Ensure enough data
     if df.shape[0] < 100:
         return 0.0, "HOLD", 0.0
 
-    data = df[["Close"]].copy().dropna()
+    data = df[["Close"]].dropna()
     values = data.values
     scaler = MinMaxScaler()
     scaled_data = scaler.fit_transform(values)
 
-    look_back = 60
+    look_back = LOOK_BACK
     X, y = [], []
 
     for i in range(look_back, len(scaled_data) - forecast_days):
@@ -28,24 +65,106 @@ def forecast_lstm(ticker, df, forecast_days=5):
     X, y = np.array(X), np.array(y)
     X = np.reshape(X, (X.shape[0], X.shape[1], 1))
 
-    model = Sequential()
-    model.add(Input(shape=(X.shape[1], 1)))
-    model.add(LSTM(units=50, return_sequences=False))
-    model.add(Dense(1))
-    model.compile(optimizer="adam", loss="mean_squared_error")
-    model.fit(X, y, epochs=5, batch_size=32, verbose=0)
+    params = {"look_back": look_back, "units": 50, "epochs": 5, "forecast_days": forecast_days}
+    key = make_key(ticker, "lstm", params, data_digest(data)) if use_registry else None
+    model = _load_or_fit(
+        _build_lstm(look_back), key, lambda m: m.fit(X, y, epochs=5, batch_size=32, verbose=0),
+        ticker=ticker, model="lstm",
+    )
 
     X_input = scaled_data[-look_back:]
     X_input = np.reshape(X_input, (1, look_back, 1))
-    forecast = model.predict(X_input, verbose=0)
+    with phase("predict"):
+        forecast = model.predict(X_input, verbose=0)
     forecast_value = float(forecast.flatten()[0])
 
     predicted_price = scaler.inverse_transform([[forecast_value]])[0][0]
     last_price = values[-1][0]
     pct_return = (predicted_price - last_price) / last_price
-    if abs(pct_return) < 0.0005:
-        return 0.0, "HOLD", 0.0
+    return _to_signal(pct_return)
 
-    signal = "BUY" if pct_return > 0 else "SELL"
-    confidence = min(abs(pct_return) * 10, 1)
-    return pct_return, signal, confidence
+# === Global (cross-sectional) LSTM ===
+def _scaled_closes(frames):
+    """Per-ticker min-max scaled closes, so one network can learn from every ticker at once."""
+    scaled = {}
+    for ticker, df in frames.items():
+        if df is None or df.shape[0] < 100 or "Close" not in df.columns:
+            continue
+        close = df["Close"].dropna().to_numpy(dtype="float64")
+        low, high = close.min(), close.max()
+        if len(close) < 100 or high <= low:
+            continue
+        scaled[ticker] = ((close - low) / (high - low), low, high)
+    return scaled
+
+def fit_global_lstm(frames, forecast_days=5, look_back=LOOK_BACK, epochs=5, batch_size=256, use_registry=True):
+    """
+    Trains a single LSTM on windows pooled from every ticker in `frames`
+    ({ticker: OHLCV DataFrame}). Inputs are min-max scaled per ticker, so the
+    network sees every series on the same [0, 1] scale.
+    """
+    import hashlib
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    from models.artifact_registry import make_key, data_digest
+
+    scaled_closes = _scaled_closes(frames)
+    X_parts, y_parts = [], []
+    for ticker, (scaled, _, _) in scaled_closes.items():
+        n_windows = len(scaled) - forecast_days - look_back
+        if n_windows <= 0:
+            continue
+        windows = sliding_window_view(scaled[:len(scaled) - forecast_days], look_back)[:n_windows]
+        X_parts.append(windows.astype("float32"))
+        y_parts.append(scaled[look_back + forecast_days - 1:look_back + forecast_days - 1 + n_windows].astype("float32"))
+
+    if not X_parts:
+        raise ValueError("Not enough data to train the global LSTM.")
+
+    X = np.concatenate(X_parts)[..., np.newaxis]
+    y = np.concatenate(y_parts)
+
+    key = None
+    if use_registry:
+        universe = hashlib.sha1()
+        for ticker in sorted(scaled_closes):
+            universe.update(f"{ticker}:{data_digest(frames[ticker])}".encode())
+        params = {"look_back": look_back, "epochs": epochs, "batch_size": batch_size, "forecast_days": forecast_days}
+        key = make_key("UNIVERSE", "lstm_global", params, universe.hexdigest())
+
+    model = _load_or_fit(
+        _build_lstm(look_back), key,
+        lambda m: m.fit(X, y, epochs=epochs, batch_size=batch_size, shuffle=True, verbose=0),
+        ticker="UNIVERSE", model="lstm_global",
+    )
+    return {"model": model, "look_back": look_back, "forecast_days": forecast_days}
+
+def predict_global_lstm(global_model, frames):
+    """
+    Forecasts every ticker in `frames` with one batched predict call; returns
+    {ticker: (return, signal, confidence)}. Tickers too short to forecast are
+    left out, so callers can fall back to a per-ticker fit.
+    """
+    import numpy as np
+
+    look_back = global_model["look_back"]
+    scaled = _scaled_closes(frames)
+    tickers = list(scaled)
+    results = {}
+    if not tickers:
+        return results
+
+    X_input = np.stack([scaled[t][0][-look_back:] for t in tickers]).astype("float32")[..., np.newaxis]
+    forecast = global_model["model"].predict(X_input, batch_size=1024, verbose=0).flatten()
+
+    for ticker, value in zip(tickers, forecast):
+        series, low, high = scaled[ticker]
+        predicted_price = low + float(value) * (high - low)
+        last_price = low + series[-1] * (high - low)
+        results[ticker] = _to_signal((predicted_price - last_price) / last_price)
+    return results
+
+def forecast_lstm_global(frames, forecast_days=5, epochs=5):
+    """Fits the global LSTM on `frames` and forecasts all of them."""
+    global_model = fit_global_lstm(frames, forecast_days, epochs=epochs)
+    return predict_global_lstm(global_model, frames)
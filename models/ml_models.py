@@ -1,32 +1,64 @@
+import hashlib
 import pandas as pd
 import numpy as np
 from xgboost import XGBRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
-def forecast_ml(df, forecast_days=5):
-    df = df.copy()
-    df['Return'] = df['Close'].pct_change()
-    df['Lag1'] = df['Return'].shift(1)
-    df['Lag2'] = df['Return'].shift(2)
-    df.dropna(inplace=True)
+def forecast_ml(df, forecast_days=5, ticker=None, use_registry=True, macro_features=None):
+    """
+    `macro_features` (features.macro_features.get_macro_features) adds the
+    point-in-time macro columns in effect on each bar to the two lag features.
+    """
+    from models.artifact_registry import make_key, data_digest, load_artifact, save_artifact
+    from utils.telemetry import phase, note
+
+    # Only the feature columns are materialised; the caller's frame is never copied or modified
+    ret = df['Close'].pct_change()
+    features = pd.DataFrame({'Return': ret, 'Lag1': ret.shift(1), 'Lag2': ret.shift(2)})
+    feature_names = ['Lag1', 'Lag2']
+    macro_digest = None
+    if macro_features is not None:
+        from features.macro_features import align_macro
+        macro = align_macro(macro_features, df.index).dropna(axis=1, how="all")
+        features = features.join(macro)
+        feature_names += list(macro.columns)
+        macro_digest = hashlib.sha1(np.ascontiguousarray(macro.to_numpy(dtype="float64")).tobytes()).hexdigest()
+
+    key = None
+    if use_registry:
+        params = {"n_estimators": 100, "max_depth": 3, "features": feature_names, "test_size": 0.2}
+        digest = data_digest(df) if macro_digest is None else f"{data_digest(df)}:{macro_digest}"
+        key = make_key(ticker or "TICKER", "xgboost", params, digest)
+
+    df = features.dropna()
 
     from xgboost import XGBRegressor
     from sklearn.model_selection import train_test_split
     from sklearn.preprocessing import StandardScaler
 
-    X = df[['Lag1', 'Lag2']]
+    X = df[feature_names]
     y = df['Return']
 
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
 
-    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, shuffle=False)
-    model = XGBRegressor(n_estimators=100, max_depth=3)
-    model.fit(X_train, y_train)
+    blob = load_artifact(key) if key is not None else None
+    if blob is not None:
+        model = XGBRegressor()
+        model.load_model(bytearray(blob))
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, shuffle=False)
+        model = XGBRegressor(n_estimators=100, max_depth=3)
+        with phase("fit"):
+            model.fit(X_train, y_train)
+        note(n_iter=model.get_booster().num_boosted_rounds())
+        if key is not None:
+            save_artifact(key, bytes(model.get_booster().save_raw("json")), ticker=ticker, model="xgboost")
 
     latest_features = scaler.transform([X.iloc[-1].values])
-    prediction = model.predict(latest_features)[0]
+    with phase("predict"):
+        prediction = model.predict(latest_features)[0]
 
     signal = "BUY" if prediction > 0 else "SELL"
     confidence = min(abs(prediction) * 10, 1)
@@ -34,32 +66,132 @@ def forecast_ml(df, forecast_days=5):
 
 
 
-def audit_ml_accuracy(df, forecast_days=5, test_size=0.2):
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import mean_absolute_error, mean_squared_error
-    from sklearn.ensemble import RandomForestRegressor
-    import numpy as np
-
-    df = df.copy()
-    df["return"] = df["Close"].pct_change()
-    df["target"] = df["Close"].shift(-forecast_days)
-    df = df.dropna()
-
-    features = df[["Close", "return"]]
-    target = df["target"]
-
-    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=test_size, shuffle=False)
-
-    model = RandomForestRegressor(n_estimators=100)
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = mean_squared_error(y_test, y_pred, squared=False)
-    direction_accuracy = np.mean(np.sign(y_pred[1:] - y_pred[:-1]) == np.sign(y_test[1:] - y_test[:-1]))
-
+# === Panel mode: one pooled model for the whole universe ===
+PANEL_PARAMS = {"n_estimators": 100, "max_depth": 3, "learning_rate": 0.3, "features": ["Lag1", "Lag2"], "test_size": 0.2}
+
+def _panel_features(frames, test_size=0.2, macro_features=None):
+    """
+    Lag features per ticker, plus the point-in-time macro columns in effect on
+    each bar when `macro_features` is given (as in forecast_ml), standardised
+    per ticker (the per-ticker StandardScaler), so every series enters the
+    pooled model on the same scale. Returns ({ticker: (X, y)}, the training
+    rows stacked over tickers).
+    """
+    if macro_features is not None:
+        from features.macro_features import align_macro
+        macro_features = macro_features.dropna(axis=1, how="all")
+
+    features = {}
+    X_parts, y_parts = [], []
+    for ticker, df in frames.items():
+        if df is None or "Close" not in df:
+            continue
+        close_series = df["Close"].dropna()
+        close = close_series.to_numpy(dtype="float64")
+        ret = close[1:] / close[:-1] - 1.0
+        if len(ret) < 30:
+            continue
+        X = np.column_stack([ret[1:-1], ret[:-2]])
+        y = ret[2:]
+        if macro_features is not None:
+            # Row i predicts the return ending at close_series.index[i + 3]; rows before a series' first release are dropped
+            macro = align_macro(macro_features, close_series.index[3:]).to_numpy(dtype="float64")
+            keep = ~np.isnan(macro).any(axis=1)
+            X, y = np.column_stack([X, macro])[keep], y[keep]
+            if len(y) < 30:
+                continue
+        std = X.std(axis=0)
+        X = (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+        features[ticker] = (X.astype("float32"), y)
+        # Same chronological split as forecast_ml: the last test_size of each ticker is held out
+        n_train = int(len(y) * (1 - test_size))
+        X_parts.append(features[ticker][0][:n_train])
+        y_parts.append(y[:n_train])
+    if not X_parts:
+        return features, (None, None)
+    return features, (np.concatenate(X_parts), np.concatenate(y_parts))
+
+def fit_ml_panel(frames, params=PANEL_PARAMS, n_jobs=-1, use_registry=True, macro_features=None):
+    """
+    Trains one hist-method XGBoost model on the lag features (and macro columns,
+    if given) of every ticker in `frames` ({ticker: OHLCV DataFrame}), built once
+    into a QuantileDMatrix and trained on all cores. Returns {"booster", "features"}.
+    """
+    import hashlib
+    import xgboost as xgb
+    from models.artifact_registry import make_key, data_digest, load_artifact, save_artifact
+    from utils.telemetry import phase, note
+
+    features, (X_train, y_train) = _panel_features(frames, params["test_size"], macro_features)
+    if X_train is None:
+        raise ValueError("Not enough data to train the panel XGBoost model.")
+
+    key = None
+    if use_registry:
+        universe = hashlib.sha1()
+        for ticker in sorted(features):
+            universe.update(f"{ticker}:{data_digest(frames[ticker])}".encode())
+        key_params = params
+        if macro_features is not None:
+            macro = macro_features.dropna(axis=1, how="all")
+            universe.update(np.ascontiguousarray(macro.to_numpy(dtype="float64")).tobytes())
+            key_params = dict(params, features=params["features"] + list(macro.columns))
+        key = make_key("UNIVERSE", "xgboost_panel", key_params, universe.hexdigest())
+
+    blob = load_artifact(key) if key is not None else None
+    if blob is not None:
+        booster = xgb.Booster()
+        booster.load_model(bytearray(blob))
+    else:
+        train_params = {
+            "objective": "reg:squarederror", "tree_method": "hist",
+            "max_depth": params["max_depth"], "eta": params["learning_rate"], "nthread": n_jobs,
+        }
+        with phase("fit"):
+            dtrain = xgb.QuantileDMatrix(X_train, y_train, nthread=n_jobs)
+            booster = xgb.train(train_params, dtrain, num_boost_round=params["n_estimators"])
+        note(n_iter=booster.num_boosted_rounds())
+        if key is not None:
+            save_artifact(key, bytes(booster.save_raw("json")), ticker="UNIVERSE", model="xgboost_panel")
+    return {"booster": booster, "features": features}
+
+def predict_ml_panel(panel_model):
+    """Predicts every ticker's latest row in one call; returns {ticker: (prediction, signal, confidence)}."""
+    from utils.telemetry import phase
+
+    tickers = list(panel_model["features"])
+    latest = np.stack([panel_model["features"][t][0][-1] for t in tickers])
+    with phase("predict"):
+        predictions = panel_model["booster"].inplace_predict(latest)
+
+    results = {}
+    for ticker, prediction in zip(tickers, predictions):
+        prediction = float(prediction)
+        results[ticker] = (prediction, "BUY" if prediction > 0 else "SELL", min(abs(prediction) * 10, 1))
+    return results
+
+def forecast_ml_panel(frames, forecast_days=5, n_jobs=-1, use_registry=True, macro_features=None):
+    """
+    Pooled-model counterpart of forecast_ml for a whole universe. Tickers too
+    short for the panel are left out, so callers can fall back to forecast_ml.
+    """
+    return predict_ml_panel(
+        fit_ml_panel(frames, n_jobs=n_jobs, use_registry=use_registry, macro_features=macro_features)
+    )
+
+def audit_ml_accuracy(df, forecast_days=5, n_origins=50, step=5, ticker="TICKER", workers=1):
+    """Walk-forward audit of forecast_ml on one price frame (see models.walk_forward_audit)."""
+    from models.walk_forward_audit import run_audit
+
+    folds, summary = run_audit(
+        {ticker: df}, models=["XGBoost"], horizons=(forecast_days,), n_origins=n_origins, step=step, workers=workers
+    )
+    if summary.empty:
+        return {}
+    row = summary.loc[("XGBoost", "ALL", forecast_days)]
     return {
-        "mae": round(mae, 4),
-        "rmse": round(rmse, 4),
-        "directional_accuracy": round(direction_accuracy, 4)
+        "folds": int(row["folds"]),
+        "mae": round(float(row["mae"]), 4),
+        "directional_accuracy": round(float(row["directional_accuracy"]), 4),
+        "hit_rate": round(float(row["hit_rate"]), 4),
     }
@@ -0,0 +1,79 @@
+# model_state.py
+# Per-ticker fitted model state, so daily runs can extend yesterday's fit instead of refitting.
+
+import os
+import pickle
+from datetime import datetime, timedelta
+
+STATE_DIR = os.environ.get("MODEL_STATE_DIR", "data/model_state")
+
+# Default full-refit schedule and drift tolerance for incremental models
+REFIT_DAYS = 7
+MAX_LLF_DRIFT = 0.5  # drop in mean per-observation log-likelihood since the last full fit
+DRIFT_MIN_OBS = 20   # single-day log-likelihoods are too noisy to judge drift on
+
+_MEMORY = {}
+
+
+def _state_path(model, ticker):
+    return os.path.join(STATE_DIR, model, f"{ticker}.pkl")
+
+
+def load_state(model, ticker):
+    key = (model, ticker)
+    if key in _MEMORY:
+        return _MEMORY[key]
+    path = _state_path(model, ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except Exception:
+        return None
+    _MEMORY[key] = state
+    return state
+
+
+def save_state(model, ticker, state):
+    _MEMORY[(model, ticker)] = state
+    path = _state_path(model, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def series_anchor(series):
+    """What a stored state remembers about the series it was fitted on."""
+    return {"n_obs": len(series), "last_index": series.index[-1], "last_value": float(series.iloc[-1])}
+
+
+def new_observations(series, state):
+    """
+    Returns how many observations `series` has beyond the one the state was
+    fitted on, or None when `series` does not extend it (shorter, different
+    window, or re-adjusted history) and a full refit is required.
+    """
+    n_obs = state["n_obs"]
+    if len(series) < n_obs:
+        return None
+    if series.index[n_obs - 1] != state["last_index"]:
+        return None
+    value = float(series.iloc[n_obs - 1])
+    if abs(value - state["last_value"]) > 1e-9 * max(abs(state["last_value"]), 1.0):
+        return None
+    return len(series) - n_obs
+
+
+def refit_due(state, refit_days=REFIT_DAYS, now=None):
+    now = now or datetime.now()
+    return now - state["fit_date"] >= timedelta(days=refit_days)
+
+
+def llf_drifted(llf_new_mean, n_new, state, max_drift=MAX_LLF_DRIFT):
+    """True when the observations since the last full fit fit clearly worse than the data it was estimated on."""
+    if n_new < DRIFT_MIN_OBS:
+        return False
+    return state["llf_per_obs"] - llf_new_mean > max_drift
@@ -0,0 +1,176 @@
+# performance_store.py
+# Single store for model outcomes, running accuracy aggregates and ensemble weights.
+#
+# SQLite in WAL mode: any number of scan workers can append outcomes in batches while pages
+# read weights. Every write updates the per-model aggregates in the same transaction, so
+# reading or re-tuning weights is O(models) however long the outcome log grows.
+
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+DB_PATH = os.environ.get("PERFORMANCE_DB", "data/model_performance.db")
+LEGACY_JSON = "data/model_performance.json"
+
+DEFAULT_WEIGHTS = {"ARIMA": 1.0, "GARCH": 1.0, "HMM": 1.0, "LSTM": 1.0, "XGBoost": 1.0}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    id INTEGER PRIMARY KEY,
+    recorded REAL NOT NULL,
+    model TEXT NOT NULL,
+    ticker TEXT,
+    horizon INTEGER,
+    signal TEXT,
+    realized_return REAL,
+    correct INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    model TEXT PRIMARY KEY,
+    correct INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS weights (
+    model TEXT PRIMARY KEY,
+    weight REAL NOT NULL,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+_INITIALIZED = set()
+
+
+def weight_from_accuracy(accuracy):
+    return round(0.5 + 1.5 * accuracy, 2)
+
+
+@contextmanager
+def _connect(path=None):
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        if path not in _INITIALIZED:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _migrate_legacy_json(conn)
+            _INITIALIZED.add(path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def _write(conn):
+    # IMMEDIATE takes the write lock up front: concurrent writers queue instead of deadlocking
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _migrate_legacy_json(conn):
+    """One-time import of the counts and weights from data/model_performance.json."""
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_migrated'").fetchone():
+        return
+    with _write(conn):
+        if os.path.exists(LEGACY_JSON):
+            with open(LEGACY_JSON, "r") as f:
+                history = json.load(f)
+            now = time.time()
+            for model, record in history.get("accuracies", {}).items():
+                conn.execute(
+                    "INSERT OR IGNORE INTO aggregates (model, correct, total, updated) VALUES (?, ?, ?, ?)",
+                    (model, int(record.get("correct", 0)), int(record.get("total", 0)), now),
+                )
+            for model, weight in history.get("weights", {}).items():
+                conn.execute("INSERT OR IGNORE INTO weights (model, weight, updated) VALUES (?, ?, ?)", (model, float(weight), now))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_migrated', ?)", (str(time.time()),))
+
+
+# === Writes ===
+def record_outcomes(outcomes, path=None):
+    """
+    Appends a batch of outcomes in one transaction and updates the running
+    aggregates and weights of the models it touches. Each outcome is a dict with
+    "model" and "correct", and optionally "ticker", "horizon", "signal" and
+    "realized_return".
+    """
+    now = time.time()
+    rows, deltas = [], {}
+    for outcome in outcomes:
+        correct = int(bool(outcome["correct"]))
+        rows.append((now, outcome["model"], outcome.get("ticker"), outcome.get("horizon"),
+                     outcome.get("signal"), outcome.get("realized_return"), correct))
+        hits, total = deltas.get(outcome["model"], (0, 0))
+        deltas[outcome["model"]] = (hits + correct, total + 1)
+    if not rows:
+        return
+
+    with _connect(path) as conn, _write(conn):
+        conn.executemany(
+            "INSERT INTO outcomes (recorded, model, ticker, horizon, signal, realized_return, correct) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows,
+        )
+        for model, (hits, total) in deltas.items():
+            conn.execute(
+                "INSERT INTO aggregates (model, correct, total, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(model) DO UPDATE SET correct = correct + excluded.correct, "
+                "total = total + excluded.total, updated = excluded.updated",
+                (model, hits, total, now),
+            )
+            correct, total = conn.execute("SELECT correct, total FROM aggregates WHERE model = ?", (model,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO weights (model, weight, updated) VALUES (?, ?, ?)",
+                (model, weight_from_accuracy(correct / max(1, total)), now),
+            )
+
+
+def tune_weights(path=None):
+    """Recomputes every model's weight from its running accuracy; returns {model: weight}."""
+    now = time.time()
+    with _connect(path) as conn, _write(conn):
+        weights = {
+            model: weight_from_accuracy(correct / max(1, total))
+            for model, correct, total in conn.execute("SELECT model, correct, total FROM aggregates")
+        }
+        conn.executemany(
+            "INSERT OR REPLACE INTO weights (model, weight, updated) VALUES (?, ?, ?)",
+            [(model, weight, now) for model, weight in weights.items()],
+        )
+    return weights
+
+
+def prune_outcomes(older_than_days, path=None):
+    """Drops raw outcomes older than `older_than_days`; aggregates and weights are kept."""
+    cutoff = time.time() - older_than_days * 86400
+    with _connect(path) as conn, _write(conn):
+        deleted = conn.execute("DELETE FROM outcomes WHERE recorded < ?", (cutoff,)).rowcount
+    return deleted
+
+
+# === Reads ===
+def load_weights(defaults=None, path=None):
+    """Stored weights on top of `defaults` (1.0 for every model)."""
+    weights = dict(DEFAULT_WEIGHTS if defaults is None else defaults)
+    with _connect(path) as conn:
+        weights.update(dict(conn.execute("SELECT model, weight FROM weights").fetchall()))
+    return weights
+
+
+def load_aggregates(path=None):
+    with _connect(path) as conn:
+        return {
+            model: {"correct": correct, "total": total, "accuracy": correct / max(1, total)}
+            for model, correct, total in conn.execute("SELECT model, correct, total FROM aggregates")
+        }
@@ -0,0 +1,166 @@
+# walk_forward_audit.py
+# Walk-forward accuracy audit of the production forecast functions: every model is refit at a
+# series of rolling origins and its forecast compared with what happened next.
+#
+# Price frames and forward returns are prepared once in the parent and handed to each worker
+# by the pool initializer; tasks are just (ticker, model, horizon, origin) tuples.
+
+import io
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+from utils.scan_engine import iter_parallel
+
+AUDIT_MODELS = ["ARIMA", "GARCH", "HMM", "LSTM", "XGBoost"]
+SIGNALS = {"BUY": 1, "SELL": -1, "HOLD": 0}
+
+_AUDIT_CONTEXT = {}
+
+
+def init_audit_context(context):
+    _AUDIT_CONTEXT.clear()
+    _AUDIT_CONTEXT.update(context)
+
+
+def _init_audit_worker(context):
+    init_audit_context(context)
+    # One BLAS/OpenMP thread per process, so N workers do not oversubscribe the cores
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def _forecast(model, ticker, train, horizon):
+    """
+    Runs one production forecast and returns (predicted return or NaN, signal).
+    Registries and incremental state are bypassed so every fold is an honest refit.
+    """
+    last_close = float(train["Close"].iloc[-1])
+    if model == "ARIMA":
+        from models.arima_model import forecast_arima
+        output = forecast_arima(ticker, train, horizon)
+        if len(output) < 3 or output[0] is None:
+            raise ValueError("ARIMA fit failed")
+        # ARIMA forecasts differenced prices: the summed change is a price move, not a return
+        return float(output[0]) / last_close, output[1]
+    if model == "GARCH":
+        from models.garch_model import forecast_garch
+        return np.nan, forecast_garch(train, horizon)
+    if model == "HMM":
+        from models.hmm_model import forecast_hmm
+        pred, signal, _ = forecast_hmm(ticker, train, horizon, use_registry=False)
+        return float(pred), signal
+    if model == "LSTM":
+        from models.lstm_model import forecast_lstm
+        pred, signal, _ = forecast_lstm(ticker, train, horizon, use_registry=False)
+        return float(pred), signal
+    if model == "XGBoost":
+        # The production model predicts the next bar's return whatever the horizon
+        from models.ml_models import forecast_ml
+        pred, signal, _ = forecast_ml(train, horizon, ticker=ticker, use_registry=False)
+        return float(pred), signal
+    raise ValueError(f"Unknown model: {model}")
+
+
+def audit_fold(task):
+    ticker, model, horizon, origin = task
+    df = _AUDIT_CONTEXT["frames"][ticker]
+    window = _AUDIT_CONTEXT.get("train_window")
+    train = df.iloc[max(0, origin - window) if window else 0:origin]
+
+    # The models print progress for every fit; keep the audit output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        predicted, signal = _forecast(model, ticker, train, horizon)
+    return {
+        "ticker": ticker,
+        "model": model,
+        "horizon": horizon,
+        "origin": df.index[origin - 1],
+        "predicted": predicted,
+        "signal": signal,
+        "realized": _AUDIT_CONTEXT["forward"][ticker][horizon][origin - 1],
+    }
+
+
+def make_folds(frames, models, horizons, n_origins=20, step=5, min_train=252):
+    """The last `n_origins` origins, `step` bars apart, whose forecast window has fully played out."""
+    tasks = []
+    for ticker, df in frames.items():
+        for horizon in horizons:
+            last = len(df) - horizon
+            origins = [o for o in range(last, min_train - 1, -step)][:n_origins]
+            tasks += [(ticker, model, horizon, origin) for model in models for origin in sorted(origins)]
+    return tasks
+
+
+def forward_returns(frames, horizons):
+    """{ticker: {horizon: array}} where entry i is Close[i + h] / Close[i] - 1 (NaN past the end)."""
+    forward = {}
+    for ticker, df in frames.items():
+        close = df["Close"].to_numpy(dtype="float64")
+        forward[ticker] = {}
+        for h in horizons:
+            out = np.full(len(close), np.nan)
+            out[:-h] = close[h:] / close[:-h] - 1.0
+            forward[ticker][h] = out
+    return forward
+
+
+def summarize_audit(folds):
+    """Directional accuracy, MAE and hit rate per model, ticker and horizon (plus an 'ALL' row per model/horizon)."""
+    folds = folds.copy()
+    folds["direction"] = folds["signal"].map(SIGNALS).fillna(0)
+    realized_sign = np.sign(folds["realized"])
+    folds["predicted_correct"] = np.where(folds["predicted"].notna(), np.sign(folds["predicted"]) == realized_sign, np.nan)
+    folds["called"] = (folds["direction"] != 0).astype(float)
+    folds["hit"] = np.where(folds["called"], folds["direction"] == realized_sign, np.nan)
+    folds["abs_error"] = (folds["predicted"] - folds["realized"]).abs()
+
+    metrics = dict(
+        folds=("realized", "size"),
+        directional_accuracy=("predicted_correct", "mean"),
+        mae=("abs_error", "mean"),
+        hit_rate=("hit", "mean"),
+        coverage=("called", "mean"),
+    )
+    per_ticker = folds.groupby(["model", "ticker", "horizon"]).agg(**metrics)
+    overall = folds.groupby(["model", "horizon"]).agg(**metrics)
+    overall["ticker"] = "ALL"
+    overall = overall.set_index("ticker", append=True).reorder_levels(["model", "ticker", "horizon"])
+    return pd.concat([overall, per_ticker]).sort_index()
+
+
+def run_audit(frames, models=AUDIT_MODELS, horizons=(5,), n_origins=20, step=5, min_train=252,
+              train_window=None, workers=1, chunk_size=8, timeout=None):
+    """
+    Replays each model over rolling origins for every ticker in `frames`
+    ({ticker: OHLCV DataFrame}) and returns (folds, summary). Folds run across
+    `workers` processes; failed folds are reported and left out.
+    """
+    frames = {t: df for t, df in frames.items() if df is not None and len(df) > min_train}
+    context = {
+        "frames": frames,
+        "forward": forward_returns(frames, horizons),
+        "train_window": train_window,
+    }
+    init_audit_context(context)
+    tasks = make_folds(frames, models, horizons, n_origins, step, min_train)
+
+    rows, failures = [], 0
+    for _, task, result, error in iter_parallel(
+        audit_fold, tasks, workers=workers, chunk_size=chunk_size, timeout=timeout,
+        initializer=_init_audit_worker, initargs=(context,),
+    ):
+        if error is not None:
+            failures += 1
+            continue
+        rows.append(result)
+    if failures:
+        print(f"⚠️ {failures} of {len(tasks)} folds failed")
+
+    folds = pd.DataFrame(rows, columns=["ticker", "model", "horizon", "origin", "predicted", "signal", "realized"])
+    return folds, summarize_audit(folds) if not folds.empty else pd.DataFrame()
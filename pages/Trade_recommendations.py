@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
-import openai
 import datetime
 from io import StringIO
 
+from utils.commentary import generate_commentaries
+
 st.set_page_config(page_title="Trade Recommendations", layout="wide")
 st.title("📈 Daily Trade Recommendations (S&P 500 Scan)")
 
@@ -44,32 +46,20 @@ st.dataframe(df.style.applymap(highlight_signal, subset=["Signal"]), use_contain
 
 # --- GPT Summary (Optional) ---
 if "OPENAI_API_KEY" in os.environ or st.secrets.get("OPENAI_API_KEY"):
-    openai.api_key = os.environ.get("OPENAI_API_KEY") or st.secrets["OPENAI_API_KEY"]
+    api_key = os.environ.get("OPENAI_API_KEY") or st.secrets["OPENAI_API_KEY"]
 
     st.subheader("🧐 AI Commentary")
-    for _, row in df.iterrows():
-        prompt = f"""
-        You are an expert financial assistant. Interpret the following signal:
-        - Ticker: {row['Ticker']}
-        - Signal: {row['Signal']}
-        - Strategy Action: {row['Action']} ({row['Size']}%)
-        - Market Regime: {row['Regime']}
-        - Confidence Score: {row['Confidence']:.2%}
-        - Rationale: {row['Rationale']}
-
-        Summarize this for a trader in 2 short bullet points.
-        """
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=100
-            )
-            bullets = response["choices"][0]["message"]["content"]
-            st.markdown(f"**{row['Ticker']} ({row['Signal']})**\n\n{bullets}")
-        except Exception as e:
-            st.warning(f"OpenAI error for {row['Ticker']}: {e}")
+    # Concurrent and cached: reruns and repeated rows do not hit the API again
+    rows = [row for _, row in df.iterrows()]
+    with st.spinner(f"Generating commentary for {len(rows)} signals..."):
+        commentaries = generate_commentaries(rows, api_key=api_key)
+
+    for row, (bullets, error) in zip(rows, commentaries):
+        signal = row.get("Signal", row.get("Final Signal"))
+        if error:
+            st.warning(f"OpenAI error for {row['Ticker']}: {error}")
+        else:
+            st.markdown(f"**{row['Ticker']} ({signal})**\n\n{bullets}")
 else:
     st.info("Set OPENAI_API_KEY as a secret or environment variable to enable AI commentary.")
 
@@ -81,14 +71,10 @@ st.markdown("We’ll soon identify ideal calls/puts based on trend, volatility,
 st.subheader("📉 Simulated Backtest (Preview)")
 days_held = st.slider("Holding period (days)", 1, 30, 5)
 
-def simulate_trade_return(signal, confidence):
-    if signal == "BUY":
-        return 0.02 * confidence * days_held / 5
-    elif signal == "SELL":
-        return -0.015 * confidence * days_held / 5
-    return 0.0
-
-df["Simulated Return"] = df.apply(lambda row: simulate_trade_return(row["Signal"], row["Confidence"]), axis=1)
+# Vectorized over the whole table (BUY: +2%, SELL: -1.5% per 5 days, scaled by confidence)
+df["Simulated Return"] = np.select(
+    [df["Signal"] == "BUY", df["Signal"] == "SELL"], [0.02, -0.015], default=0.0
+) * df["Confidence"] * days_held / 5
 total = df["Simulated Return"].sum()
 st.metric("📈 Simulated Portfolio Return", f"{total:.2%}")
 st.bar_chart(df.set_index("Ticker")["Simulated Return"])
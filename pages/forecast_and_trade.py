@@ -13,6 +13,7 @@ from utils.helpers import fetch_price_data
 from models.ensemble import generate_forecast_ensemble, classify_market_regime
 from pages.strategy_settings import get_user_strategy_settings
 from features.strategy_engine import apply_strategy_settings
+from utils.expert import get_expert_settings
 
 # --- Page Title ---
 st.title("📈 Forecast & Trade Dashboard")
@@ -22,6 +23,10 @@ ticker = st.sidebar.text_input("Enter Ticker", "AAPL").upper()
 interval = st.sidebar.selectbox("Data Interval", ["1m", "5m", "15m", "30m", "60m", "1d"], index=2)
 period = st.sidebar.selectbox("Lookback Period", ["1d", "5d", "7d", "1mo", "3mo", "6mo", "1y"], index=2)
 forecast_horizon = st.sidebar.selectbox("Forecast Horizon", ["1 Day", "1 Week", "1 Month"], index=1)
+streaming = interval != "1d" and st.sidebar.toggle(
+    "⚡ Streaming Mode", value=False,
+    help="Update indicators, regime, GARCH and HMM on every new closed bar instead of refitting from scratch.",
+)
 
 user_strategy = get_user_strategy_settings()
 
@@ -43,10 +48,23 @@ except Exception as e:
     st.error(f"❌ Failed to load data for {ticker}: {e}")
     st.stop()
 
+# --- Cached ensemble run ---
+# Keyed by ticker, interval, period, horizon, model settings and the last bar (timestamp and
+# close, since an intraday bar keeps changing until it closes). The price frame itself is
+# not hashed (leading underscore): the last bar stands in for it.
+@st.cache_data(ttl=900, max_entries=32, show_spinner=False)
+def run_forecast_ensemble(ticker, interval, period, horizon, model_settings, last_bar, _df):
+    return generate_forecast_ensemble(_df, horizon=horizon)
+
 # --- Generate Forecasts ---
 st.subheader("🔮 Forecast Model Ensemble")
 with st.spinner("Running forecasting models..."):
-    results = generate_forecast_ensemble(df, horizon=forecast_horizon)
+    results = run_forecast_ensemble(
+        ticker, interval, period, forecast_horizon,
+        repr(sorted(get_expert_settings().items())),
+        (str(last_timestamp), float(df["Close"].iloc[-1])),
+        df,
+    )
     forecast_df = results["forecast_table"]
     signal = str(results["final_signal"])
     rationale = str(results["rationale"])
@@ -60,6 +78,58 @@ regime = classify_market_regime(df)
 st.subheader("🧭 Detected Market Regime")
 st.markdown(f"**Current Market Regime:** `{regime}`")
 
+# --- Live Intraday Signals (streaming mode) ---
+# The engine lives in the session: it is warmed up once on the loaded bars, then the fragment
+# below polls for newly closed bars and only advances its state. Full refits follow the
+# "intraday" cadence in config.json.
+if streaming:
+    from features.intraday_stream import IntradayEngine, PollingSource, load_settings
+
+    stream_key = (ticker, interval, period)
+    if st.session_state.get("intraday_key") != stream_key:
+        if st.session_state.get("intraday_engine") is not None:
+            st.session_state.intraday_engine.close()
+        closed = df.iloc[:-1]  # the last bar is still forming
+        with st.spinner("Warming up the streaming engine..."):
+            st.session_state.intraday_engine = IntradayEngine.from_history({ticker: closed})
+        st.session_state.intraday_source = PollingSource([ticker], interval, "1d", since=closed.index[-1])
+        st.session_state.intraday_rows = []
+        st.session_state.intraday_key = stream_key
+
+    @st.fragment(run_every=load_settings()["poll_seconds"])
+    def live_intraday_panel():
+        engine = st.session_state.intraday_engine
+        try:
+            events = st.session_state.intraday_source.poll()
+        except Exception as e:
+            st.warning(f"⚠️ Could not poll new bars: {e}")
+            events = []
+        for timestamp, bars in events:
+            st.session_state.intraday_rows.append(engine.on_bar(timestamp, bars).loc[ticker].rename(timestamp))
+        st.session_state.intraday_rows = st.session_state.intraday_rows[-200:]
+
+        st.subheader("⚡ Live Intraday Signals")
+        rows = st.session_state.intraday_rows
+        if not rows:
+            st.info("Waiting for the next closed bar...")
+            return
+        live = pd.DataFrame(rows)
+        latest = live.iloc[-1]
+        cols = st.columns(5)
+        cols[0].metric("Close", f"{latest['Close']:.2f}", f"{latest['Return %']:.2f}%")
+        cols[1].metric("RSI", f"{latest['RSI']:.1f}")
+        cols[2].metric("Regime", latest["Regime"])
+        cols[3].metric("GARCH Vol (next bar)", f"{latest['GARCH Vol %']:.3f}%")
+        cols[4].metric("HMM State", f"{latest['HMM State']} ({latest['HMM Prob']:.0%})")
+        st.dataframe(live.tail(20).iloc[::-1], use_container_width=True)
+        latency = engine.latency_ms()
+        st.caption(
+            f"Last bar `{live.index[-1]}` · update p50 {latency['p50']} ms, max {latency['max']} ms · "
+            f"{engine.refits} full refits (every {engine.refit_every} bars)"
+        )
+
+    live_intraday_panel()
+
 # --- Final Signal Display ---
 st.subheader("📌 Final Trade Signal")
 st.markdown(f"### 📍 **Signal: `{signal}`**")
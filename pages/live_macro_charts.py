@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas_datareader.data as web
 import plotly.graph_objects as go
 import datetime
-import wbdata
-import pandas as pd
+
+from features.macro_data import get_fred, get_world_bank, get_countries
 
 # --- Config ---
 st.set_page_config(page_title="Live Macroeconomic Charts", layout="wide")
@@ -47,9 +46,12 @@ co2_indicators = {
     "CO₂ - Coal (Proposed)": "CC.COAL.EMPR.CO"
 }
 
-# --- Country List ---
-all_countries = wbdata.get_countries()
-country_dict = {c["name"]: c["id"] for c in all_countries if c["region"]["id"] != "NA"}
+# --- Country List (cached on disk; "Refresh" bypasses the TTLs) ---
+all_countries = get_countries(force=refresh)
+country_dict = dict(zip(
+    all_countries.loc[all_countries["region_id"] != "NA", "name"],
+    all_countries.loc[all_countries["region_id"] != "NA", "id"],
+))
 selected_countries = st.sidebar.multiselect("🌍 Select Countries", options=sorted(country_dict.keys()), default=["United States", "Germany"])
 
 # --- Tabs ---
@@ -59,7 +61,7 @@ tabs = st.tabs(["📊 FRED", "🌍 GDP", "📈 Inflation", "📉 Unemployment",
 with tabs[0]:
     try:
         st.subheader(f"{fred_label_map[fred_series]} Over Time")
-        fred_data = web.DataReader(fred_series, "fred", start_date, end_date)
+        fred_data = get_fred(fred_series, start_date, end_date, force=refresh)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=fred_data.index, y=fred_data[fred_series], mode='lines'))
@@ -73,19 +75,20 @@ with tabs[0]:
     except Exception as e:
         st.error(f"Failed to load FRED data: {e}")
 
-# --- Helper for World Bank Tabs ---
-def render_world_bank_chart(label, indicator_code):
-    try:
-        st.subheader(f"{label} ({start_year}–{end_year})")
-        selected_iso = [country_dict[c] for c in selected_countries]
-        raw_df = wbdata.get_dataframe({indicator_code: label}, country=selected_iso).reset_index()
+# --- Helpers for World Bank Tabs ---
+selected_iso = [country_dict[c] for c in selected_countries]
 
-        if 'country' not in raw_df.columns and len(selected_countries) == 1:
-            raw_df['country'] = selected_countries[0]
+def load_world_bank(indicator_codes):
+    # One cached, batched request for all the indicators
+    return get_world_bank(indicator_codes, selected_iso, start_date, end_date, force=refresh)
 
-        raw_df['date'] = pd.to_datetime(raw_df['date'], format='%Y')
-        filtered_df = raw_df[(raw_df['date'] >= start_date) & (raw_df['date'] <= end_date)]
-        pivot_df = filtered_df.pivot(index='date', columns='country', values=label)
+def render_world_bank_chart(label, indicator_code, data=None):
+    try:
+        st.subheader(f"{label} ({start_year}–{end_year})")
+        if data is None:
+            data = load_world_bank([indicator_code])
+        filtered_df = data[data["indicator"] == indicator_code]
+        pivot_df = filtered_df.pivot(index='date', columns='country', values='value')
 
         fig = go.Figure()
         for country in pivot_df.columns:
@@ -111,6 +114,11 @@ with tabs[3]: render_world_bank_chart("Unemployment Rate (%)", indicator_map["Un
 with tabs[4]:
     selected_co2 = st.multiselect("Select CO₂ Indicators", options=list(co2_indicators.keys()), default=["CO₂ - Total Energy"])
 
-    for co2_label in selected_co2:
-        code = co2_indicators[co2_label]
-        render_world_bank_chart(co2_label, code)
+    try:
+        co2_data = load_world_bank([co2_indicators[label] for label in selected_co2])
+    except Exception as e:
+        st.error(f"Failed to load World Bank CO₂ data: {e}")
+        co2_data = None
+    if co2_data is not None:
+        for co2_label in selected_co2:
+            render_world_bank_chart(co2_label, co2_indicators[co2_label], co2_data)
@@ -2,8 +2,6 @@ import streamlit as st
 st.set_page_config(page_title="Portfolio Optimization", layout="wide")
 
 import pandas as pd
-import numpy as np
-from scipy.optimize import minimize
 import seaborn as sns
 import matplotlib.pyplot as plt
 import datetime
@@ -11,8 +9,10 @@ import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from utils.helpers import fetch_price_data
+from utils.price_store import get_prices
 from models.ensemble import classify_market_regime
+from features.portfolio_optimizer import estimate_moments, max_sharpe, efficient_frontier, portfolio_stats
+from features.walk_forward import walk_forward, apply_regime_tilt
 
 st.title("📊 Portfolio Optimization (Regime-Aware + Sector-Tuned)")
 
@@ -40,14 +40,12 @@ for ticker in tickers:
 # --- Load price data ---
 @st.cache_data(ttl=3600)
 def load_prices(tickers, start, end):
-    data = {}
-    for t in tickers:
-        try:
-            df = fetch_price_data(t, start, end)
-            data[t] = df["Close"]
-        except Exception as e:
-            st.warning(f"{t} skipped: {e}")
-    return pd.DataFrame(data)
+    # One batched store update for the whole universe instead of a download per ticker
+    frames = get_prices(tickers, start, end)
+    missing = [t for t in tickers if t not in frames]
+    if missing:
+        st.warning(f"Skipped (no data): {', '.join(missing)}")
+    return pd.DataFrame({t: df["Close"] for t, df in frames.items()})
 
 prices = load_prices(tickers, start_date, end_date)
 if prices.shape[1] < 2:
@@ -56,25 +54,17 @@ if prices.shape[1] < 2:
 
 returns = prices.pct_change().dropna()
 
-# --- Optimization ---
-def neg_sharpe(weights, ret, rf):
-    mean_ret = np.sum(weights * ret.mean()) * 252
-    vol = np.sqrt(np.dot(weights.T, np.dot(ret.cov() * 252, weights)))
-    return -(mean_ret - rf) / vol
+# --- Optimization (moments estimated once, reused by every solve below) ---
+mu, cov = estimate_moments(returns)
+tickers = list(returns.columns)
 
-n = len(tickers)
-init = np.ones(n) / n
-bounds = [(0, 1)] * n
-constraints = {"type": "eq", "fun": lambda w: np.sum(w) - 1}
-
-opt = minimize(neg_sharpe, init, args=(returns, rf), method="SLSQP", bounds=bounds, constraints=constraints)
-
-if not opt.success:
+try:
+    weights = max_sharpe(mu, cov, rf=rf, bounds=(0, 1))
+except RuntimeError:
     st.error("❌ Optimization failed.")
     st.stop()
-
-weights = pd.Series(opt.x, index=tickers)
-regime = classify_market_regime(prices)
+# Regime of the equal-weight basket (classify_market_regime expects a "Close" column)
+regime = classify_market_regime((1 + returns.mean(axis=1)).cumprod().to_frame("Close"))
 
 st.subheader("🧭 Detected Market Regime")
 st.markdown(f"**Current Regime:** `{regime}`")
@@ -83,26 +73,18 @@ st.markdown(f"**Current Regime:** `{regime}`")
 adjusted_weights = weights.copy()
 if regime_logic_enabled:
     st.info("⚙️ Regime-switching adjustment enabled based on sectors.")
-    risky_sectors = ["Technology", "Financials", "Energy"]
     if regime == "Bear":
         st.warning("🐻 Bear regime: reducing risky sector exposure.")
-        for ticker in tickers:
-            if sector_map.get(ticker) in risky_sectors:
-                adjusted_weights[ticker] *= 0.5
     elif regime == "Bull":
         st.success("🐂 Bull regime: boosting growth sector exposure.")
-        for ticker in tickers:
-            if sector_map.get(ticker) in risky_sectors:
-                adjusted_weights[ticker] *= 1.2
-    adjusted_weights /= adjusted_weights.sum()
+    adjusted_weights = apply_regime_tilt(weights, regime, sector_map)
 else:
     st.info("🔁 Regime adjustment is disabled.")
 
 # --- Metrics ---
 w = adjusted_weights
-ann_ret = np.sum(w * returns.mean()) * 252
-vol = np.sqrt(np.dot(w.T, np.dot(returns.cov() * 252, w)))
-sharpe = (ann_ret - rf) / vol
+stats = portfolio_stats(w, mu, cov, rf)
+ann_ret, vol, sharpe = stats["return"], stats["volatility"], stats["sharpe"]
 port_ret = (returns * w).sum(axis=1)
 
 st.subheader("📈 Regime-Aware Optimized Allocation")
@@ -117,11 +99,56 @@ maxdd = (cumret / cumret.cummax() - 1).min()
 st.markdown(f"**Max Drawdown:** `{maxdd:.2%}`")
 st.line_chart(cumret.rename("Portfolio Value"))
 
+st.subheader("🧮 Efficient Frontier")
+frontier, _ = efficient_frontier(mu, cov, n_points=40, rf=rf)
+fig, ax = plt.subplots()
+ax.plot(frontier["volatility"], frontier["return"], label="Efficient frontier")
+ax.scatter([vol], [ann_ret], color="red", zorder=3, label="Selected allocation")
+ax.set_xlabel("Volatility")
+ax.set_ylabel("Expected Return")
+ax.legend()
+st.pyplot(fig)
+
 st.subheader("📉 Asset Correlation Heatmap")
 fig, ax = plt.subplots()
-sns.heatmap(returns.corr(), annot=True, cmap="coolwarm", ax=ax)
+# Annotations are unreadable beyond a couple of dozen assets
+sns.heatmap(returns.corr(), annot=len(tickers) <= 20, cmap="coolwarm", ax=ax)
 st.pyplot(fig)
 
+# --- Walk-Forward Backtest ---
+st.subheader("🔁 Walk-Forward Rebalancing Backtest")
+st.markdown("Re-optimizes on a schedule using only the data available at each rebalance date (no look-ahead).")
+wf_cols = st.columns(4)
+wf_frequency = wf_cols[0].selectbox("Rebalance", ["M", "Q", "W"], format_func={"M": "Monthly", "Q": "Quarterly", "W": "Weekly"}.get)
+wf_window = wf_cols[1].number_input("Lookback window (days)", 60, 1260, 252, step=21)
+wf_expanding = wf_cols[2].checkbox("Expanding window", value=False)
+wf_cost = wf_cols[3].number_input("Cost (bps per turnover)", 0.0, 100.0, 5.0)
+
+wf = None
+if len(returns) > wf_window:
+    wf = walk_forward(
+        returns, window=int(wf_window), expanding=wf_expanding, frequency=wf_frequency, rf=rf,
+        sector_map=sector_map, regime_tilt=regime_logic_enabled, cost_bps=wf_cost,
+    )
+
+# Also empty when no rebalance date falls after the first window
+if wf is None or wf["returns"].empty or not wf["stats"]:
+    st.info("Not enough history for the chosen lookback window.")
+else:
+    equal_weight = returns.loc[wf["returns"].index].mean(axis=1)
+    st.line_chart(pd.DataFrame({
+        "Walk-Forward": (1 + wf["returns"]).cumprod(),
+        "Equal Weight": (1 + equal_weight).cumprod(),
+    }))
+    wf_stats = wf["stats"]
+    metric_cols = st.columns(5)
+    metric_cols[0].metric("Annual Return", f"{wf_stats['annual_return']:.2%}")
+    metric_cols[1].metric("Volatility", f"{wf_stats['volatility']:.2%}")
+    metric_cols[2].metric("Sharpe", f"{wf_stats['sharpe']:.2f}")
+    metric_cols[3].metric("Max Drawdown", f"{wf_stats['max_drawdown']:.2%}")
+    metric_cols[4].metric("Avg Turnover", f"{wf['turnover'].iloc[1:].mean():.1%}" if len(wf["turnover"]) > 1 else "n/a")
+    st.area_chart(wf["weights"])
+
 # --- Export Weights ---
 df_out = pd.DataFrame({
     "Ticker": w.index,
@@ -1,5 +1,7 @@
 import os
 import json
+import time
+import argparse
 import pandas as pd
 from datetime import datetime
 from collections import Counter
@@ -8,128 +10,370 @@ from utils.common import fetch_price_data
 from utils.helpers import load_config
 from utils.sp500_tickers import get_sp500_tickers
 from utils.tuner import load_model_weights, update_model_weights
+from utils.scan_engine import iter_parallel
+from utils.price_store import update_prices, get_prices
+from utils.telemetry import track, summarize, write_telemetry
+from utils.shared_panel import SharedPanel
+from utils.scan_output import ScanWriter, completed_tickers, finalize
+from features.cascade import stage_one_scores, select_candidates, stage_one_recall
 
 from models.arima_model import forecast_arima
-from models.garch_model import forecast_garch
+from models.garch_model import forecast_garch, forecast_garch_panel
 from models.hmm_model import forecast_hmm
-from models.lstm_model import forecast_lstm
-from models.ml_models import forecast_ml
-
-# === Load configuration ===
-config = load_config()
-enabled_models = config["models"]
-forecast_days = config["forecast_days"]
-ticker_mode = config.get("ticker_mode", "sp500")
-
-# === Load tickers ===
-tickers = get_sp500_tickers()
-
-# === Load model weights ===
-model_weights = load_model_weights()
-
-# === Helper: Regime classification ===
-def classify_market_regime(df):
-    df["return"] = df["Close"].pct_change()
-    recent_return = df["return"].iloc[-20:].mean()
-    if recent_return > 0.05:
-        return "Bull"
-    elif recent_return < -0.05:
-        return "Bear"
+from models.lstm_model import forecast_lstm, forecast_lstm_global
+from models.ml_models import forecast_ml, forecast_ml_panel
+from models.model_state import REFIT_DAYS
+from models.artifact_registry import evict
+from models.ensemble import classify_market_regime
+from features.macro_features import get_macro_features
+
+OUTPUT_PATH = "data/top_trades.csv"
+# Columns of every result row; model signal columns follow them
+RESULT_COLUMNS = ["Ticker", "Date", "Final Signal", "Regime", "Confidence", "Rationale"]
+# Per-scan timing summary (.json) and per-model-call records (.csv), next to OUTPUT_PATH
+TELEMETRY_NAME = "scan_telemetry"
+# Latest full (non-cascade) scan, kept to measure the cascade's stage-one recall against
+REFERENCE_PATH = "data/scan_reference.csv"
+
+# === Per-scan context (set in the parent, and in each worker by the pool initializer) ===
+_SCAN_CONTEXT = {}
+
+def init_scan_context(context):
+    _SCAN_CONTEXT.clear()
+    _SCAN_CONTEXT.update(context)
+
+# === Per-ticker scan ===
+def scan_ticker(ticker):
+    # The ticker-level record carries the end-to-end time; model records are nested inside it
+    telemetry = []
+    with track("Ticker", ticker) as record:
+        telemetry.append(record)
+        result = _scan_ticker(ticker, telemetry)
+    result["telemetry"] = telemetry
+    return result
+
+def _scan_ticker(ticker, telemetry):
+    enabled_models = _SCAN_CONTEXT["enabled_models"]
+    forecast_days = _SCAN_CONTEXT["forecast_days"]
+    model_weights = _SCAN_CONTEXT["model_weights"]
+    incremental = _SCAN_CONTEXT.get("incremental", {})
+    refit_days = incremental.get("refit_days", REFIT_DAYS)
+    # Models already run for the whole universe in the parent: {model: {ticker: (pred, signal, conf)}}
+    precomputed = _SCAN_CONTEXT.get("precomputed", {})
+
+    if "shared_panel" in _SCAN_CONTEXT:
+        # Zero-copy view of the parent's shared float32 panel: nothing pickled, nothing read from disk
+        panel = SharedPanel.attach(_SCAN_CONTEXT["shared_panel"])
+        df = panel.frame(ticker) if ticker in panel else None
     else:
-        return "Neutral"
+        df = fetch_price_data(ticker, start_date=_SCAN_CONTEXT["start_date"], end_date=_SCAN_CONTEXT["end_date"])
+    if df is None or df.empty or "Close" not in df.columns:
+        raise ValueError(f"No valid price data for {ticker}")
+    n_obs = len(df)
+    telemetry[0]["n_obs"] = n_obs
 
-# === Forecast loop ===
-forecast_results = []
-print("📊 Scanning tickers for forecast signals...")
+    predictions = {}
+    confidence_scores = {}
 
-for ticker in tickers:
-    try:
-        df = fetch_price_data(ticker, start_date="2020-01-01", end_date=datetime.today().strftime("%Y-%m-%d"))
-        if df is None or df.empty or "Close" not in df.columns:
-            print(f"❌ Error: No valid price data for {ticker}")
+    if enabled_models.get("arima"):
+        try:
+            with track("ARIMA", ticker, n_obs) as record:
+                telemetry.append(record)
+                pred, signal, conf = forecast_arima(
+                    ticker, df, forecast_days, incremental=incremental.get("arima", False), refit_days=refit_days
+                )
+            predictions["ARIMA"] = signal
+            confidence_scores["ARIMA"] = round(float(conf), 4)
+        except Exception as e:
+            predictions["ARIMA"] = f"ERROR: {e}"
+            confidence_scores["ARIMA"] = 0
+
+    if enabled_models.get("garch"):
+        try:
+            with track("GARCH", ticker, n_obs) as record:
+                telemetry.append(record)
+                if ticker in precomputed.get("GARCH", {}):
+                    _, signal, _ = precomputed["GARCH"][ticker]
+                else:
+                    # Left out of the panel (short history or a failed refit): fit this ticker alone
+                    signal = forecast_garch(
+                        df, forecast_days, ticker=ticker, incremental=incremental.get("garch", False), refit_days=refit_days
+                    )
+            predictions["GARCH"] = signal
+            confidence_scores["GARCH"] = 1
+        except Exception as e:
+            predictions["GARCH"] = f"ERROR: {e}"
+            confidence_scores["GARCH"] = 0
+
+    if enabled_models.get("hmm"):
+        try:
+            with track("HMM", ticker, n_obs) as record:
+                telemetry.append(record)
+                pred, signal, conf = forecast_hmm(
+                    ticker, df, forecast_days, incremental=incremental.get("hmm", False), refit_days=refit_days
+                )
+            predictions["HMM"] = signal
+            confidence_scores["HMM"] = round(float(conf), 4)
+        except Exception as e:
+            predictions["HMM"] = f"ERROR: {e}"
+            confidence_scores["HMM"] = 0
+
+    if enabled_models.get("lstm"):
+        try:
+            with track("LSTM", ticker, n_obs) as record:
+                telemetry.append(record)
+                if ticker in precomputed.get("LSTM", {}):
+                    pred, signal, conf = precomputed["LSTM"][ticker]
+                else:
+                    # Not covered by the global model (too short a history): fit this ticker alone
+                    pred, signal, conf = forecast_lstm(ticker, df, forecast_days)
+            predictions["LSTM"] = signal
+            confidence_scores["LSTM"] = round(float(conf), 4)
+        except Exception as e:
+            predictions["LSTM"] = f"ERROR: {e}"
+            confidence_scores["LSTM"] = 0
+
+    if enabled_models.get("ml"):
+        try:
+            with track("XGBoost", ticker, n_obs) as record:
+                telemetry.append(record)
+                if ticker in precomputed.get("XGBoost", {}):
+                    pred, signal, conf = precomputed["XGBoost"][ticker]
+                else:
+                    pred, signal, conf = forecast_ml(
+                        df, forecast_days, ticker=ticker, macro_features=_SCAN_CONTEXT.get("macro_features")
+                    )
+            predictions["XGBoost"] = signal
+            confidence_scores["XGBoost"] = round(float(conf), 4)
+        except Exception as e:
+            predictions["XGBoost"] = f"ERROR: {e}"
+            confidence_scores["XGBoost"] = 0
+
+    # === Voting logic ===
+    votes = {"BUY": 0, "SELL": 0, "HOLD": 0}
+    for model, signal in predictions.items():
+        if signal in votes:
+            weight = model_weights.get(model, 1.0)
+            conf = confidence_scores.get(model, 1.0)
+            votes[signal] += weight * conf
+
+    final_signal = max(votes, key=votes.get) if any(votes.values()) else "HOLD"
+    regime = classify_market_regime(df, macro_features=_SCAN_CONTEXT.get("macro_features"))
+
+    rationale = f"Vote weights: {votes}. Adjusted for regime: {regime}."
+
+    result = {
+        "Ticker": ticker,
+        "Date": datetime.today().strftime("%Y-%m-%d"),
+        "Final Signal": final_signal,
+        "Regime": regime,
+        "Confidence": round(max(votes.values()), 4),
+        "Rationale": rationale
+    }
+    result.update(predictions)
+    return result
+
+# === Forecast loop ===
+def run_scan(tickers, context, workers=1, chunk_size=1, timeout=None, telemetry=None, sink=None):
+    """
+    Scans `tickers` across `workers` processes and returns the result rows in
+    the same order as `tickers`. Failed or timed-out tickers are reported and
+    left out, as in the serial loop. If `telemetry` is a list, the per-call
+    utils.telemetry records of every ticker are appended to it. If `sink` is
+    given, each result row is passed to it as soon as it arrives.
+    """
+    init_scan_context(context)
+    rows = []
+    for index, ticker, result, error in iter_parallel(
+        scan_ticker, tickers, workers=workers, chunk_size=chunk_size, timeout=timeout,
+        initializer=init_scan_context, initargs=(context,),
+    ):
+        if error is not None:
+            print(f"❌ Error processing {ticker}: {error}")
+            if telemetry is not None:
+                telemetry.append({"model": "Ticker", "ticker": ticker, "error": error.split(":")[0]})
             continue
+        records = result.pop("telemetry", [])
+        if telemetry is not None:
+            telemetry.extend(records)
+        if sink is not None:
+            sink(result)
+        rows.append((index, result))
 
-        predictions = {}
-        confidence_scores = {}
+    rows.sort(key=lambda r: r[0])
+    return [result for _, result in rows]
 
-        if enabled_models.get("arima"):
-            try:
-                pred, signal, conf = forecast_arima(ticker, df, forecast_days)
-                predictions["ARIMA"] = signal
-                confidence_scores["ARIMA"] = round(float(conf), 4)
-            except Exception as e:
-                predictions["ARIMA"] = f"ERROR: {e}"
-                confidence_scores["ARIMA"] = 0
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan S&P 500 tickers for forecast signals.")
+    parser.add_argument("--workers", type=int, help="Worker processes (1 = serial).")
+    parser.add_argument("--chunk-size", type=int, help="Tickers handed to a worker at a time.")
+    parser.add_argument("--timeout", type=float, help="Per-ticker wall-clock timeout in seconds.")
+    parser.add_argument("--resume", action="store_true", help="Skip tickers already saved for today's scan.")
+    parser.add_argument("--finalize", action="store_true", help="Only assemble today's saved results into the output.")
+    args = parser.parse_args(argv)
+    scan_date = datetime.today().strftime("%Y-%m-%d")
 
-        if enabled_models.get("garch"):
-            try:
-                signal = forecast_garch(df, forecast_days)
-                predictions["GARCH"] = signal
-                confidence_scores["GARCH"] = 1
-            except Exception as e:
-                predictions["GARCH"] = f"ERROR: {e}"
-                confidence_scores["GARCH"] = 0
+    if args.finalize:
+        if not completed_tickers(scan_date):
+            parser.error(f"no saved scan results for {scan_date}; nothing to finalize")
+        forecast_df = finalize(scan_date, OUTPUT_PATH, columns=RESULT_COLUMNS)
+        print(f"💾 Saved {len(forecast_df)} results to {OUTPUT_PATH}")
+        return
 
-        if enabled_models.get("hmm"):
-            try:
-                pred, signal, conf = forecast_hmm(ticker, df, forecast_days)
-                predictions["HMM"] = signal
-                confidence_scores["HMM"] = round(float(conf), 4)
-            except Exception as e:
-                predictions["HMM"] = f"ERROR: {e}"
-                confidence_scores["HMM"] = 0
+    # === Load configuration ===
+    config = load_config()
+    scan_config = config.get("scan", {})
+    workers = args.workers if args.workers is not None else scan_config.get("workers", 1)
+    chunk_size = args.chunk_size or scan_config.get("chunk_size", 1)
+    timeout = args.timeout if args.timeout is not None else scan_config.get("ticker_timeout")
 
-        if enabled_models.get("lstm"):
-            try:
-                pred, signal, conf = forecast_lstm(ticker, df, forecast_days)
-                predictions["LSTM"] = signal
-                confidence_scores["LSTM"] = round(float(conf), 4)
-            except Exception as e:
-                predictions["LSTM"] = f"ERROR: {e}"
-                confidence_scores["LSTM"] = 0
+    context = {
+        "enabled_models": config["models"],
+        "forecast_days": config["forecast_days"],
+        "model_weights": load_model_weights(),
+        "incremental": config.get("incremental", {}),
+        "start_date": "2020-01-01",
+        "end_date": datetime.today().strftime("%Y-%m-%d"),
+    }
+
+    # === Load tickers ===
+    tickers = get_sp500_tickers()
+    pending = tickers
+    if args.resume:
+        done = completed_tickers(scan_date)
+        pending = [t for t in tickers if t not in done]
+        print(f"⏩ Resuming {scan_date}: {len(tickers) - len(pending)} tickers already done, {len(pending)} to go")
+
+    # === Refresh the local price store in multi-ticker batches; workers then read from disk ===
+    print(f"📥 Updating price store for {len(tickers)} tickers...")
+    update_prices(tickers, context["start_date"], context["end_date"])
+
+    telemetry = []
+    if config.get("macro_features", {}).get("enabled", False):
+        # One point-in-time macro matrix for every ticker, extended incrementally from its on-disk cache
+        try:
+            context["macro_features"] = get_macro_features(context["start_date"], context["end_date"])
+            print(f"🌐 Macro features: {', '.join(context['macro_features'].columns)}")
+        except Exception as e:
+            print(f"❌ Macro features unavailable, scanning without them: {e}")
+    frames = None
 
-        if enabled_models.get("ml"):
+    # === Cascade: cheap stage-one signals pick the tickers that get the full model stack ===
+    cascade = config.get("cascade", {})
+    cascade_report = None
+    if cascade.get("enabled", False):
+        frames = get_prices(tickers, context["start_date"], context["end_date"], update=False)
+        with track("CASCADE_STAGE1", "UNIVERSE", sum(len(df) for df in frames.values())) as record:
+            telemetry.append(record)
+            scores = stage_one_scores(
+                frames, momentum_window=cascade.get("momentum_window", 20),
+                macro_features=context.get("macro_features"),
+            )
+        candidates = select_candidates(scores, cascade.get("top_k"), cascade.get("min_score"))
+        print(f"🪜 Stage one kept {len(candidates)} of {len(scores)} tickers for the full models")
+        cascade_report = {"scored": int(len(scores)), "candidates": len(candidates)}
+        reference_path = cascade.get("reference", REFERENCE_PATH)
+        if os.path.exists(reference_path):
+            # The recall report is a diagnostic: a bad reference file must not stop the scan
             try:
-                signal = forecast_ml(df, forecast_days)
-                predictions["XGBoost"] = signal
-                confidence_scores["XGBoost"] = 1
+                cascade_report.update(stage_one_recall(candidates, pd.read_csv(reference_path)))
+                print(f"🎯 Stage-one recall vs full run: {cascade_report['recall']} "
+                      f"(top-{len(candidates)}: {cascade_report['recall_top_k']})")
             except Exception as e:
-                predictions["XGBoost"] = f"ERROR: {e}"
-                confidence_scores["XGBoost"] = 0
-
-        # === Voting logic ===
-        votes = {"BUY": 0, "SELL": 0, "HOLD": 0}
-        for model, signal in predictions.items():
-            if signal in votes:
-                weight = model_weights.get(model, 1.0)
-                conf = confidence_scores.get(model, 1.0)
-                votes[signal] += weight * conf
-
-        final_signal = max(votes, key=votes.get) if any(votes.values()) else "HOLD"
-        regime = classify_market_regime(df)
-
-        rationale = f"Vote weights: {votes}. Adjusted for regime: {regime}."
-
-        result = {
-            "Ticker": ticker,
-            "Date": datetime.today().strftime("%Y-%m-%d"),
-            "Final Signal": final_signal,
-            "Regime": regime,
-            "Confidence": round(max(votes.values()), 4),
-            "Rationale": rationale
-        }
-        result.update(predictions)
-        forecast_results.append(result)
-
-    except Exception as e:
-        print(f"❌ Error processing {ticker}: {e}")
-
-# === Save Results ===
-os.makedirs("data", exist_ok=True)
-forecast_df = pd.DataFrame(forecast_results)
-forecast_df.to_csv("data/top_trades.csv", index=False)
-update_model_weights(forecast_df)
-
-print("💾 Saved to data/top_trades.csv")
-print("✅ Summary:")
-print(forecast_df.head(5))
+                print(f"❌ Skipping stage-one recall, unusable reference {reference_path}: {e}")
+        candidate_set = set(candidates)
+        pending = [t for t in pending if t in candidate_set]
+        # The pooled models below only need to cover what stage two will forecast
+        frames = {t: frames[t] for t in candidates if t in frames}
+
+    # === Universe-wide models, fitted once in the parent (on the candidates only under the cascade) ===
+    precomputed = {}
+    if context["enabled_models"].get("lstm") and config.get("lstm_mode", "per_ticker") == "global":
+        print("🧠 Training global LSTM across the universe...")
+        if frames is None:
+            frames = get_prices(tickers, context["start_date"], context["end_date"], update=False)
+        try:
+            with track("LSTM_GLOBAL", "UNIVERSE", sum(len(df) for df in frames.values())) as record:
+                telemetry.append(record)
+                precomputed["LSTM"] = forecast_lstm_global(frames, context["forecast_days"])
+        except Exception as e:
+            print(f"❌ Global LSTM failed, falling back to per-ticker fits: {e}")
+    if context["enabled_models"].get("garch") and config.get("garch_mode", "per_ticker") == "panel":
+        print("📉 Filtering GARCH variances across the universe...")
+        if frames is None:
+            frames = get_prices(tickers, context["start_date"], context["end_date"], update=False)
+        refit_days = context["incremental"].get("refit_days", REFIT_DAYS)
+        try:
+            with track("GARCH_PANEL", "UNIVERSE", sum(len(df) for df in frames.values())) as record:
+                telemetry.append(record)
+                panel = forecast_garch_panel(
+                    frames, context["forecast_days"], refit_days, workers=workers, chunk_size=chunk_size
+                )
+            precomputed["GARCH"] = {t: (out["mean"] / 100, out["signal"], 1) for t, out in panel.items()}
+        except Exception as e:
+            print(f"❌ GARCH panel failed, falling back to per-ticker fits: {e}")
+    if context["enabled_models"].get("ml") and config.get("ml_mode", "per_ticker") == "panel":
+        print("🌲 Training pooled XGBoost across the universe...")
+        if frames is None:
+            frames = get_prices(tickers, context["start_date"], context["end_date"], update=False)
+        try:
+            with track("XGBoost_PANEL", "UNIVERSE", sum(len(df) for df in frames.values())) as record:
+                telemetry.append(record)
+                precomputed["XGBoost"] = forecast_ml_panel(
+                    frames, context["forecast_days"], macro_features=context.get("macro_features")
+                )
+        except Exception as e:
+            print(f"❌ Panel XGBoost failed, falling back to per-ticker fits: {e}")
+    context["precomputed"] = precomputed
+
+    panel = None
+    if scan_config.get("shared_panel", False):
+        if frames is None:
+            frames = get_prices(tickers, context["start_date"], context["end_date"], update=False)
+        panel = SharedPanel.create({t: frames[t] for t in pending if t in frames})
+        context["shared_panel"] = panel.spec
+        print(f"🧩 Shared price panel: {len(panel.tickers)} tickers, {panel.nbytes / 1e6:.1f} MB")
+    frames = None
+
+    print(f"📊 Scanning {len(pending)} tickers for forecast signals ({workers} worker(s))...")
+    scan_start = time.perf_counter()
+    # Results stream to per-date shards as they finish, so a crash loses at most one shard
+    try:
+        with ScanWriter(scan_date, scan_config.get("shard_size", 25), resume=args.resume) as writer:
+            run_scan(
+                pending, context, workers=workers, chunk_size=chunk_size, timeout=timeout,
+                telemetry=telemetry, sink=writer.add,
+            )
+    finally:
+        if panel is not None:
+            panel.close()
+            panel.unlink()
+    scan_seconds = time.perf_counter() - scan_start
+
+    # Saves only evict in batches, so trim the registry to its budget once per scan
+    evict()
+
+    # === Save Results ===
+    forecast_df = finalize(scan_date, OUTPUT_PATH, columns=RESULT_COLUMNS)
+    update_model_weights(forecast_df)
+
+    print(f"💾 Saved {len(forecast_df)} results to {OUTPUT_PATH}")
+    if cascade_report is None and not forecast_df.empty and "Final Signal" in forecast_df.columns:
+        # A full run is the yardstick the cascade's stage-one recall is measured against
+        forecast_df.to_csv(cascade.get("reference", REFERENCE_PATH), index=False)
+
+    # === Scan telemetry ===
+    summary = summarize(telemetry, seconds=scan_seconds, n_tickers=len(pending))
+    if cascade_report is not None:
+        summary["cascade"] = cascade_report
+    json_path, _ = write_telemetry(telemetry, summary, os.path.dirname(OUTPUT_PATH), TELEMETRY_NAME)
+    print(f"⏱️ {summary.get('tickers_per_s')} tickers/s; slowest models (p95): " + ", ".join(
+        f"{model} {stats.get('total_p95_s')}s" for model, stats in
+        sorted(summary["models"].items(), key=lambda item: -(item[1].get("total_p95_s") or 0))[:3]
+    ))
+    print(f"💾 Telemetry saved to {json_path}")
+    print("✅ Summary:")
+    print(forecast_df.head(5))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# commentary.py
+# AI commentary for trade signals: concurrent chat-completion requests with retry/backoff,
+# cached by a hash of the prompt fields so Streamlit reruns and repeated rows cost nothing.
+#
+# Talks to any OpenAI-compatible `{base_url}/chat/completions` endpoint; point `base_url`
+# (or OPENAI_BASE_URL) at a local stub server to run without the real API.
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.helpers import load_section
+
+CACHE_DIR = os.environ.get("COMMENTARY_CACHE_DIR", "data/commentary_cache")
+
+# Defaults, overridable through the "commentary" section of config/config.json
+DEFAULTS = {
+    "base_url": "https://api.openai.com/v1",
+    "model": "gpt-4",
+    "temperature": 0.7,
+    "max_tokens": 100,
+    "max_workers": 8,
+    "max_retries": 4,
+    "backoff_seconds": 1.0,
+    "timeout": 30,
+}
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+PROMPT_FIELDS = ["Ticker", "Signal", "Action", "Size", "Regime", "Confidence", "Rationale"]
+
+_MEMORY = {}
+_LOCK = threading.Lock()
+
+
+def _settings(**overrides):
+    settings = load_section("commentary", DEFAULTS)
+    if os.environ.get("OPENAI_BASE_URL"):
+        settings["base_url"] = os.environ["OPENAI_BASE_URL"]
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return settings
+
+
+def prompt_fields(row):
+    """The fields of a trade row that go into its prompt; accepts a dict or a pandas row."""
+    fields = {}
+    for name in PROMPT_FIELDS:
+        value = row.get(name, "")
+        if name == "Confidence":
+            value = round(float(value or 0.0), 4)
+        fields[name] = "" if value is None else value
+    # Scanner output names the ensemble vote "Final Signal"
+    if not fields["Signal"] and row.get("Final Signal"):
+        fields["Signal"] = row.get("Final Signal")
+    return fields
+
+
+def build_prompt(fields):
+    action = f"{fields['Action']} ({fields['Size']}%)" if fields["Action"] else "n/a"
+    return f"""
+    You are an expert financial assistant. Interpret the following signal:
+    - Ticker: {fields['Ticker']}
+    - Signal: {fields['Signal']}
+    - Strategy Action: {action}
+    - Market Regime: {fields['Regime']}
+    - Confidence Score: {fields['Confidence']:.2%}
+    - Rationale: {fields['Rationale']}
+
+    Summarize this for a trader in 2 short bullet points.
+    """
+
+
+def cache_key(fields, settings):
+    payload = json.dumps(
+        {"fields": fields, "model": settings["model"], "temperature": settings["temperature"],
+         "max_tokens": settings["max_tokens"]},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# === Cache (memory, then disk) ===
+def _cache_get(key):
+    with _LOCK:
+        if key in _MEMORY:
+            return _MEMORY[key]
+    try:
+        with open(os.path.join(CACHE_DIR, f"{key}.json"), "r") as f:
+            text = json.load(f)["text"]
+    except (OSError, ValueError, KeyError):
+        return None
+    with _LOCK:
+        _MEMORY[key] = text
+    return text
+
+
+def _cache_put(key, text):
+    with _LOCK:
+        _MEMORY[key] = text
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{key}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump({"text": text, "created": time.time()}, f)
+    os.replace(path + ".tmp", path)
+
+
+# === HTTP ===
+def _complete(session, prompt, api_key, settings):
+    """One chat completion with retries on rate limits, server errors and dropped connections."""
+    import requests
+
+    url = settings["base_url"].rstrip("/") + "/chat/completions"
+    body = {
+        "model": settings["model"],
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": settings["temperature"],
+        "max_tokens": settings["max_tokens"],
+    }
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    for attempt in range(settings["max_retries"] + 1):
+        retry_after = None
+        try:
+            response = session.post(url, json=body, headers=headers, timeout=settings["timeout"])
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response.json()["choices"][0]["message"]["content"].strip()
+            retry_after = response.headers.get("Retry-After")
+            error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if attempt == settings["max_retries"]:
+            raise error
+        # Exponential backoff with jitter, or what the server asked for
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = settings["backoff_seconds"] * (2 ** attempt) * (0.5 + random.random())
+        time.sleep(delay)
+
+
+def generate_commentaries(rows, api_key=None, **overrides):
+    """
+    Commentary for each trade row (dicts or pandas rows). Returns a list aligned
+    with `rows` of (text, error) pairs. Cached rows are served without a request,
+    identical rows share one request, and the rest run concurrently on up to
+    `max_workers` threads.
+    """
+    import requests
+
+    settings = _settings(**overrides)
+    fields = [prompt_fields(row) for row in rows]
+    keys = [cache_key(f, settings) for f in fields]
+
+    results = {key: (_cache_get(key), None) for key in set(keys)}
+    pending = {key: f for key, f in zip(keys, fields) if results[key][0] is None}
+
+    if pending:
+        workers = max(1, min(settings["max_workers"], len(pending)))
+        session = requests.Session()
+        session.mount(settings["base_url"], requests.adapters.HTTPAdapter(pool_maxsize=workers))
+
+        def fetch(item):
+            key, row_fields = item
+            try:
+                text = _complete(session, build_prompt(row_fields), api_key, settings)
+                _cache_put(key, text)
+                return key, (text, None)
+            except Exception as e:
+                return key, (None, f"{type(e).__name__}: {e}")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results.update(pool.map(fetch, pending.items()))
+        session.close()
+
+    return [results[key] for key in keys]
@@ -1,7 +1,7 @@
-import yfinance as yf
+from utils.price_store import get_price_data
 
 def fetch_price_data(ticker, start_date, end_date):
-    data = yf.download(ticker, start=start_date, end=end_date)
+    data = get_price_data(ticker, start_date, end_date)
     if data.empty:
         raise ValueError(f"No data found for {ticker}")
     return data
@@ -1,18 +1,49 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import json
 import os
 
+from utils.price_store import get_price_data
+
 # === Load user strategy config ===
 def load_config(path="config/config.json"):
     with open(path, "r") as f:
         return json.load(f)
 
+def load_section(name, defaults=None, path="config/config.json"):
+    """
+    `defaults` overlaid with the `name` section of the config. A missing config
+    file gives the defaults; a malformed one raises, like load_config.
+    """
+    settings = dict(defaults or {})
+    try:
+        config = load_config(path)
+    except FileNotFoundError:
+        return settings
+    settings.update(config.get(name) or {})
+    return settings
+
+# yfinance period strings -> how far back to read from the local price store
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1), "5d": pd.DateOffset(days=5), "7d": pd.DateOffset(days=7),
+    "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3), "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2), "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
 # === Fetch intraday or historical price data ===
 def fetch_price_data(ticker, interval="1d", period="1y"):
     try:
-        df = yf.download(ticker, interval=interval, period=period)
+        if interval == "1d" and period in PERIOD_OFFSETS:
+            # Daily bars come from the local store; intraday bars are always fetched live
+            start = pd.Timestamp.today().normalize() - PERIOD_OFFSETS[period]
+            df = get_price_data(ticker, start)
+        else:
+            import yfinance as yf
+
+            df = yf.download(ticker, interval=interval, period=period, progress=False)
+            if isinstance(df.columns, pd.MultiIndex):
+                df = df.xs(ticker, axis=1, level=-1)
         if df.empty or "Close" not in df.columns:
             raise ValueError("No valid price data found.")
         df = df[["Open", "High", "Low", "Close", "Volume"]]
@@ -0,0 +1,200 @@
+# price_store.py
+
+import os
+import json
+import pandas as pd
+from datetime import datetime, timedelta
+
+# One Parquet file per ticker, plus a small JSON sidecar recording what range has been fetched
+STORE_DIR = os.environ.get("PRICE_STORE_DIR", "data/price_store")
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+BATCH_SIZE = 50
+
+# Set PRICE_STORE_OFFLINE=1 (e.g. in tests) to serve only what is already on disk
+OFFLINE = os.environ.get("PRICE_STORE_OFFLINE", "0") == "1"
+
+
+def _data_path(ticker):
+    return os.path.join(STORE_DIR, f"{ticker}.parquet")
+
+
+def _meta_path(ticker):
+    return os.path.join(STORE_DIR, f"{ticker}.json")
+
+
+def _to_date(value):
+    return pd.Timestamp(value).tz_localize(None).normalize() if value is not None else None
+
+
+def _read_meta(ticker):
+    path = _meta_path(ticker)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def read_store(ticker):
+    """Returns the stored OHLCV history for `ticker`, or None if it has never been fetched."""
+    path = _data_path(ticker)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def _write_store(ticker, df, meta):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    # Write-then-rename so a concurrent reader never sees a half-written file
+    tmp_path = _data_path(ticker) + ".tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, _data_path(ticker))
+    tmp_meta = _meta_path(ticker) + ".tmp"
+    with open(tmp_meta, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, _meta_path(ticker))
+
+
+def _normalize(raw, tickers):
+    """Splits a yf.download result into one clean OHLCV frame per ticker."""
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+
+    for ticker in tickers:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if ticker in raw.columns.get_level_values(0):
+                df = raw[ticker]
+            elif ticker in raw.columns.get_level_values(-1):
+                df = raw.xs(ticker, axis=1, level=-1)
+            else:
+                continue
+        elif len(tickers) == 1:
+            df = raw
+        else:
+            continue
+
+        df = df[[c for c in COLUMNS if c in df.columns]].dropna(how="all")
+        if df.empty or "Close" not in df.columns:
+            continue
+        df.index = pd.DatetimeIndex(df.index).tz_localize(None)
+        df.index.name = "Date"
+        frames[ticker] = df.astype("float64")
+    return frames
+
+
+def _download(tickers, start, end):
+    import yfinance as yf
+
+    raw = yf.download(
+        tickers, start=start.strftime("%Y-%m-%d"), end=end.strftime("%Y-%m-%d"),
+        group_by="ticker", auto_adjust=True, threads=True, progress=False,
+    )
+    return _normalize(raw, tickers)
+
+
+def update_prices(tickers, start, end=None, batch_size=BATCH_SIZE):
+    """
+    Brings the store up to date for `tickers` over [start, end).
+
+    Tickers that are missing, or stored from a later start, are fetched in full;
+    tickers already stored are fetched only from their last stored bar onwards.
+    Requests that share a start date are grouped into multi-ticker downloads.
+    """
+    if OFFLINE:
+        return
+
+    today = _to_date(datetime.today())
+    start = _to_date(start)
+    end = _to_date(end) if end is not None else today + timedelta(days=1)
+    # At most one incremental fetch per ticker per day; a bar stored while still
+    # partial is replaced through the overlap on the next day's fetch
+    checked = str(min(end, today).date())
+
+    # Group tickers by the date their fetch has to start from
+    requests = {}
+    stored = {}
+    for ticker in tickers:
+        meta = _read_meta(ticker)
+        df = read_store(ticker)
+        if df is None or df.empty or _to_date(meta.get("covered_from", df.index[0])) > start:
+            requests.setdefault(start, []).append(ticker)
+            continue
+        if _to_date(meta.get("checked_through", df.index[-1])) >= min(end, today):
+            continue
+        stored[ticker] = (df, meta)
+        # Overlap by two bars: the last one may have been partial when stored, and
+        # the one before it tells us whether history was re-adjusted since
+        requests.setdefault(df.index[max(len(df) - 2, 0)].normalize(), []).append(ticker)
+
+    full_refetch = []
+    for fetch_start, group in sorted(requests.items()):
+        for i in range(0, len(group), batch_size):
+            batch = group[i:i + batch_size]
+            try:
+                fetched = _download(batch, fetch_start, end)
+            except Exception as e:
+                print(f"❌ Price download failed for {len(batch)} tickers: {e}")
+                continue
+
+            for ticker in batch:
+                new = fetched.get(ticker)
+                if ticker not in stored:
+                    if new is not None:
+                        _write_store(ticker, new, {"covered_from": str(start.date()), "checked_through": checked})
+                    continue
+
+                old, meta = stored[ticker]
+                if new is None or new.empty:
+                    meta["checked_through"] = checked
+                    _write_store(ticker, old, meta)
+                    continue
+
+                overlap = old.index[max(len(old) - 2, 0)]
+                if overlap in new.index:
+                    old_close, new_close = old.loc[overlap, "Close"], new.loc[overlap, "Close"]
+                    if abs(new_close - old_close) > 1e-6 * max(abs(old_close), 1.0):
+                        full_refetch.append(ticker)
+                        continue
+
+                merged = pd.concat([old, new])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                meta["checked_through"] = checked
+                _write_store(ticker, merged, meta)
+
+    # History was re-adjusted (split/dividend): replace the whole ticker
+    for i in range(0, len(full_refetch), batch_size):
+        batch = full_refetch[i:i + batch_size]
+        try:
+            fetched = _download(batch, start, end)
+        except Exception as e:
+            print(f"❌ Price download failed for {len(batch)} tickers: {e}")
+            continue
+        for ticker, df in fetched.items():
+            _write_store(ticker, df, {"covered_from": str(start.date()), "checked_through": checked})
+
+
+def get_prices(tickers, start, end=None, update=True):
+    """Returns {ticker: OHLCV DataFrame} for [start, end), served from the local store."""
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    if update:
+        update_prices(tickers, start, end)
+
+    start = _to_date(start)
+    end = _to_date(end) if end is not None else None
+    frames = {}
+    for ticker in tickers:
+        df = read_store(ticker)
+        if df is None:
+            continue
+        df = df[df.index >= start]
+        if end is not None:
+            df = df[df.index < end]
+        if not df.empty:
+            frames[ticker] = df
+    return frames
+
+
+def get_price_data(ticker, start, end=None, update=True):
+    """Single-ticker convenience wrapper around get_prices; empty DataFrame when unavailable."""
+    return get_prices([ticker], start, end, update=update).get(ticker, pd.DataFrame(columns=COLUMNS))
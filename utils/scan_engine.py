@@ -0,0 +1,156 @@
+# scan_engine.py
+
+import os
+import time
+import queue
+import signal
+import multiprocessing as mp
+
+# Extra seconds a chunk may run past its per-ticker budget before the worker is killed
+GRACE_SECONDS = 30
+
+
+class TickerTimeout(BaseException):
+    """
+    Raised inside a worker when one item exceeds its wall-clock budget.
+    Derives from BaseException so the broad `except Exception` blocks in the
+    model code cannot swallow it and keep fitting.
+    """
+
+
+def _alarm_handler(signum, frame):
+    raise TickerTimeout("ticker timed out")
+
+
+def _run_one(func, index, item, timeout):
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _alarm_handler)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return index, item, func(item), None
+    except TickerTimeout:
+        return index, item, None, f"TickerTimeout: exceeded {timeout}s"
+    except Exception as e:
+        return index, item, None, f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+# === Worker side ===
+_started = None
+
+
+def _init_worker(started, initializer, initargs):
+    global _started
+    _started = started
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_chunk(chunk_id, func, chunk, timeout):
+    if _started is not None:
+        # Shared memory, not a queue: visible to the parent even if we crash right after
+        _started[2 * chunk_id] = os.getpid()
+        _started[2 * chunk_id + 1] = time.time()
+    return [_run_one(func, index, item, timeout) for index, item in chunk]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _kill(pid):
+    try:
+        os.kill(pid, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+    except OSError:
+        pass
+
+
+# === Public API ===
+def iter_parallel(func, items, workers=1, chunk_size=1, timeout=None, initializer=None, initargs=()):
+    """
+    Runs func(item) for every item across a process pool and yields
+    (index, item, result, error) tuples as chunks complete. `error` is None on
+    success, otherwise an "ExceptionClass: message" string.
+
+    Each item gets `timeout` seconds of wall-clock time. A worker that hangs past
+    its chunk budget is killed, and one that crashes is detected; the items of
+    that chunk are reported as errors and the pool replaces the worker, so the
+    rest of the run carries on.
+    """
+    indexed = list(enumerate(items))
+    chunk_size = max(1, int(chunk_size or 1))
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+
+    if not workers or workers <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for chunk in chunks:
+            for index, item in chunk:
+                yield _run_one(func, index, item, timeout)
+        return
+
+    started = mp.Array("d", 2 * len(chunks), lock=False)
+    done = queue.Queue()
+    pool = mp.Pool(workers, initializer=_init_worker, initargs=(started, initializer, initargs))
+
+    try:
+        pending = {}
+        for chunk_id, chunk in enumerate(chunks):
+            pending[chunk_id] = chunk
+            pool.apply_async(
+                _run_chunk, (chunk_id, func, chunk, timeout),
+                callback=lambda res, cid=chunk_id: done.put((cid, res, None)),
+                error_callback=lambda exc, cid=chunk_id: done.put((cid, None, exc)),
+            )
+
+        while pending:
+            try:
+                chunk_id, results, exc = done.get(timeout=0.5)
+            except queue.Empty:
+                chunk_id = None
+
+            if chunk_id is not None and chunk_id in pending:
+                chunk = pending.pop(chunk_id)
+                if exc is not None:
+                    results = [(i, item, None, f"{type(exc).__name__}: {exc}") for i, item in chunk]
+                yield from results
+
+            now = time.time()
+            for cid in list(pending):
+                pid, start = int(started[2 * cid]), started[2 * cid + 1]
+                if not pid:
+                    continue
+                chunk = pending[cid]
+                budget = timeout * len(chunk) + GRACE_SECONDS if timeout else None
+                timed_out = budget is not None and now - start > budget
+                if not timed_out and _pid_alive(pid):
+                    continue
+                # A result may have landed between the queue poll and this check
+                if not done.empty():
+                    break
+                if timed_out:
+                    _kill(pid)
+                    error = f"WorkerTimeout: chunk exceeded {budget:.0f}s"
+                else:
+                    error = "WorkerCrashed: worker process exited unexpectedly"
+                del pending[cid]
+                yield from [(i, item, None, error) for i, item in chunk]
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def run_parallel(func, items, workers=1, chunk_size=1, timeout=None, initializer=None, initargs=()):
+    """Same as iter_parallel, but collects everything and returns it in input order."""
+    results = list(iter_parallel(func, items, workers, chunk_size, timeout, initializer, initargs))
+    return sorted(results, key=lambda r: r[0])
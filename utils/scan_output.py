@@ -0,0 +1,103 @@
+# scan_output.py
+# Streaming, resumable scan output.
+#
+# Results are written as they arrive in small CSV shards under data/scan_runs/<scan date>/, and
+# each flushed shard's tickers are appended to a checkpoint file. A resumed run skips the
+# checkpointed tickers; finalize() assembles the shards into the ranked top_trades output.
+
+import os
+import glob
+import shutil
+import pandas as pd
+
+RUNS_DIR = os.environ.get("SCAN_RUNS_DIR", "data/scan_runs")
+CHECKPOINT_NAME = "completed.txt"
+SHARD_PATTERN = "shard-*.csv"
+
+
+def run_dir(scan_date, runs_dir=None):
+    return os.path.join(runs_dir or RUNS_DIR, str(scan_date))
+
+
+def completed_tickers(scan_date, runs_dir=None):
+    """Tickers whose results are safely on disk for `scan_date`."""
+    path = os.path.join(run_dir(scan_date, runs_dir), CHECKPOINT_NAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _write_atomic_csv(df, path):
+    tmp_path = path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class ScanWriter:
+    """
+    Buffers result rows and flushes every `shard_size` of them to a new shard.
+    The shard is renamed into place before its tickers are checkpointed, so a
+    crash can at worst re-scan a shard's tickers (finalize keeps the latest row
+    per ticker), never lose or half-write one. Without `resume` the scan date's
+    directory is started afresh.
+    """
+
+    def __init__(self, scan_date, shard_size=25, resume=False, runs_dir=None):
+        self.directory = run_dir(scan_date, runs_dir)
+        self.shard_size = max(1, int(shard_size))
+        if not resume and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._next_shard = len(glob.glob(os.path.join(self.directory, SHARD_PATTERN)))
+        self._buffer = []
+        self.written = 0
+
+    def add(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        shard_path = os.path.join(self.directory, f"shard-{self._next_shard:05d}.csv")
+        _write_atomic_csv(pd.DataFrame(self._buffer), shard_path)
+        with open(os.path.join(self.directory, CHECKPOINT_NAME), "a") as f:
+            f.write("".join(f"{row['Ticker']}\n" for row in self._buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        self.written += len(self._buffer)
+        self._next_shard += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Flush on errors too: whatever finished before a crash is kept for --resume
+        self.close()
+
+
+def finalize(scan_date, output_path, runs_dir=None, columns=None):
+    """
+    Concatenates the scan date's shards, keeps the latest row per ticker, ranks
+    by Confidence (highest first) and writes `output_path`. Returns the DataFrame.
+    Without shards the output is still replaced, by an empty frame with `columns`,
+    so an earlier scan's results never outlive it.
+    """
+    shards = sorted(glob.glob(os.path.join(run_dir(scan_date, runs_dir), SHARD_PATTERN)))
+    if shards:
+        df = pd.concat([pd.read_csv(path) for path in shards], ignore_index=True)
+        df = df.drop_duplicates(subset="Ticker", keep="last")
+        if "Confidence" in df.columns:
+            df = df.sort_values("Confidence", ascending=False, kind="stable")
+        df = df.reset_index(drop=True)
+    else:
+        df = pd.DataFrame(columns=columns or [])
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    _write_atomic_csv(df, output_path)
+    return df
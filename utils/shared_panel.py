@@ -0,0 +1,126 @@
+# shared_panel.py
+# Read-only OHLCV panel in shared memory for scan workers.
+#
+# The parent packs every ticker's bars into one float32 block (plus a block of timestamps) and
+# hands workers a small spec dict instead of pickled DataFrames; workers attach by name and get
+# zero-copy DataFrame views of the tickers they scan.
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Panels created by this process, by block name: attaching to one of them reuses it
+_OWNED = {}
+# Panels attached by this process (workers keep theirs for the life of the pool)
+_ATTACHED = {}
+
+
+def _attach_block(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach registers the block with the resource tracker,
+        # which would unlink it when the first worker exits
+        from multiprocessing import resource_tracker
+        block = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+class SharedPanel:
+    """
+    All tickers' rows stacked in one (rows x columns) array, with a parallel
+    array of int64 timestamps and a ticker -> (offset, length) map.
+
+    In the parent: panel = SharedPanel.create(frames), pass panel.spec to the
+    workers, and panel.unlink() when the scan is done. In a worker:
+    SharedPanel.attach(spec).frame(ticker).
+    """
+
+    def __init__(self, spec, values_block, dates_block):
+        self.spec = spec
+        self._blocks = (values_block, dates_block)
+        rows = spec["rows"]
+        self.values = np.ndarray((rows, len(spec["columns"])), dtype=spec["dtype"], buffer=values_block.buf)
+        self.dates = np.ndarray((rows,), dtype="int64", buffer=dates_block.buf)
+        # Workers share these pages: any in-place write would be a bug, so make it raise
+        self.values.flags.writeable = False
+        self.dates.flags.writeable = False
+
+    @classmethod
+    def create(cls, frames, columns=COLUMNS, dtype="float32"):
+        """Copies {ticker: OHLCV DataFrame} into new shared memory blocks; missing columns are NaN."""
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        rows = sum(len(df) for df in frames.values())
+        itemsize = np.dtype(dtype).itemsize
+        values_block = shared_memory.SharedMemory(create=True, size=max(1, rows * len(columns) * itemsize))
+        dates_block = shared_memory.SharedMemory(create=True, size=max(1, rows * 8))
+
+        values = np.ndarray((rows, len(columns)), dtype=dtype, buffer=values_block.buf)
+        dates = np.ndarray((rows,), dtype="int64", buffer=dates_block.buf)
+        offsets = {}
+        offset = 0
+        for ticker, df in frames.items():
+            n = len(df)
+            values[offset:offset + n] = df.reindex(columns=columns).to_numpy(dtype=dtype)
+            dates[offset:offset + n] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+            offsets[ticker] = (offset, n)
+            offset += n
+
+        spec = {
+            "values": values_block.name,
+            "dates": dates_block.name,
+            "rows": rows,
+            "columns": list(columns),
+            "dtype": np.dtype(dtype).str,
+            "offsets": offsets,
+        }
+        panel = cls(spec, values_block, dates_block)
+        _OWNED[values_block.name] = panel
+        return panel
+
+    @classmethod
+    def attach(cls, spec):
+        """The panel described by `spec`, attached once per process."""
+        name = spec["values"]
+        if name in _OWNED:
+            return _OWNED[name]
+        if name not in _ATTACHED:
+            _ATTACHED[name] = cls(spec, _attach_block(name), _attach_block(spec["dates"]))
+        return _ATTACHED[name]
+
+    @property
+    def tickers(self):
+        return list(self.spec["offsets"])
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes
+
+    def __contains__(self, ticker):
+        return ticker in self.spec["offsets"]
+
+    def frame(self, ticker):
+        """Zero-copy, read-only OHLCV DataFrame view of one ticker's rows."""
+        if ticker not in self.spec["offsets"]:
+            raise KeyError(f"{ticker} is not in the shared panel")
+        offset, n = self.spec["offsets"][ticker]
+        index = pd.DatetimeIndex(self.dates[offset:offset + n].view("datetime64[ns]"))
+        return pd.DataFrame(self.values[offset:offset + n], index=index, columns=self.spec["columns"], copy=False)
+
+    def close(self):
+        self.values = self.dates = None
+        for block in self._blocks:
+            try:
+                block.close()
+            except BufferError:
+                # Frames handed out still view the block; the mapping goes when they do
+                pass
+
+    def unlink(self):
+        """Frees the shared memory; call once, in the process that created the panel."""
+        _OWNED.pop(self.spec["values"], None)
+        for block in self._blocks:
+            block.unlink()
@@ -0,0 +1,117 @@
+# telemetry.py
+# Per-call timing and diagnostics for the forecasting models.
+#
+# Callers wrap a model call in `track(...)`; the model itself marks its `phase("fit")`
+# and `phase("predict")` and reports `note(n_iter=..., converged=...)`. Outside of a
+# `track` block, phase() and note() do nothing, so models work the same untracked.
+
+import json
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+RECORD_FIELDS = ["model", "ticker", "n_obs", "total_s", "fit_s", "predict_s", "n_iter", "converged", "error"]
+
+# Open records, innermost last; per thread because Streamlit serves sessions from threads
+_local = threading.local()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def track(model, ticker=None, n_obs=None):
+    """Times one model call and yields its record. Exceptions are recorded by class and re-raised."""
+    record = {field: None for field in RECORD_FIELDS}
+    record.update({"model": model, "ticker": ticker, "n_obs": n_obs})
+    stack = _stack()
+    stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = record["error"] or type(e).__name__
+        raise
+    finally:
+        record["total_s"] = round(time.perf_counter() - start, 6)
+        stack.remove(record)
+
+
+@contextmanager
+def phase(name):
+    """Adds the time spent in the block to `<name>_s` of the innermost tracked call."""
+    stack = _stack()
+    record = stack[-1] if stack else None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if record is not None:
+            record[f"{name}_s"] = round((record.get(f"{name}_s") or 0.0) + time.perf_counter() - start, 6)
+
+
+def note(**fields):
+    """Sets diagnostics (n_iter, converged, error, ...) on the innermost tracked call."""
+    stack = _stack()
+    if stack:
+        stack[-1].update(fields)
+
+
+# === Aggregation ===
+def summarize(records, seconds=None, n_tickers=None, top=10):
+    """
+    Per-scan summary: throughput, p50/p95 of total/fit/predict time per model,
+    error and non-convergence counts, and the slowest tickers. Records with
+    model "Ticker" carry a ticker's end-to-end time.
+    """
+    df = pd.DataFrame(records, columns=RECORD_FIELDS)
+    summary = {"records": len(df)}
+    if seconds is not None:
+        summary["seconds"] = round(seconds, 3)
+        if n_tickers:
+            summary["tickers"] = n_tickers
+            summary["tickers_per_s"] = round(n_tickers / seconds, 3) if seconds > 0 else None
+
+    models = {}
+    for model, group in df[df["model"] != "Ticker"].groupby("model"):
+        stats = {"calls": len(group), "errors": int(group["error"].notna().sum())}
+        for column in ["total_s", "fit_s", "predict_s"]:
+            values = group[column].dropna().to_numpy(dtype="float64")
+            if len(values):
+                stats[f"{column[:-2]}_p50_s"] = round(float(np.percentile(values, 50)), 4)
+                stats[f"{column[:-2]}_p95_s"] = round(float(np.percentile(values, 95)), 4)
+        stats["total_s"] = round(float(group["total_s"].sum()), 3)
+        stats["not_converged"] = int((group["converged"] == False).sum())  # noqa: E712 (None = unknown)
+        stats["error_classes"] = group["error"].dropna().value_counts().to_dict()
+        models[model] = stats
+    summary["models"] = models
+
+    tickers = df[df["model"] == "Ticker"]
+    summary["failed_tickers"] = int(tickers["error"].notna().sum())
+    tickers = tickers.dropna(subset=["total_s"])
+    if tickers.empty:
+        # No ticker-level records: rank by the summed model time instead
+        tickers = df.groupby("ticker", as_index=False)["total_s"].sum()
+    slowest = tickers.sort_values("total_s", ascending=False).head(top)
+    summary["slowest_tickers"] = [
+        {"ticker": row.ticker, "total_s": round(float(row.total_s), 3)} for row in slowest.itertuples()
+    ]
+    return summary
+
+
+def write_telemetry(records, summary, output_dir, name="scan_telemetry"):
+    """Writes `<name>.json` (summary) and `<name>.csv` (one row per model call) to `output_dir`."""
+    os.makedirs(output_dir, exist_ok=True)
+    json_path = os.path.join(output_dir, f"{name}.json")
+    csv_path = os.path.join(output_dir, f"{name}.csv")
+    with open(json_path, "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    pd.DataFrame(records, columns=RECORD_FIELDS).to_csv(csv_path, index=False)
+    return json_path, csv_path
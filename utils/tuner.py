@@ -1,13 +1,5 @@
 # dynamic_tuning.py
 
-import pandas as pd
-import json
-import os
-
-# Path to model performance history
-PERFORMANCE_LOG = "data/model_performance_log.csv"
-TUNING_CONFIG = "config/model_weights.json"
-
 # Default model weights (fallback)
 def default_weights():
     return {
@@ -18,40 +10,25 @@ def default_weights():
         "XGBoost": 1.0
     }
 
-# Load historical performance log and compute new weights
+# Recompute weights from the shared performance store (models/performance_store)
 def update_model_weights(forecast_df=None):
+    from models.performance_store import tune_weights, load_weights
+
     if forecast_df is not None:
         # OPTIONAL: Write logic to update performance log from forecast_df
         pass  # Placeholder for future logging
 
-    if not os.path.exists(PERFORMANCE_LOG):
-        print("No performance log found. Using default weights.")
-        return default_weights()
-
-    df = pd.read_csv(PERFORMANCE_LOG)
-
-    required_cols = {"Model", "Accuracy", "Sharpe", "Return"}
-    if not required_cols.issubset(set(df.columns)):
-        print("Performance log missing required columns. Using default weights.")
-        return default_weights()
-
-    df["score"] = 0.4 * df["Accuracy"] + 0.3 * df["Sharpe"] + 0.3 * df["Return"]
-    total_score = df["score"].sum()
-    weights = (df.groupby("Model")["score"].mean() / total_score).to_dict()
-
-    with open(TUNING_CONFIG, "w") as f:
-        json.dump(weights, f, indent=4)
-
+    tune_weights()
+    weights = load_weights(default_weights())
     print("Updated model weights:", weights)
     return weights
 
 
 # Load weights in other modules
 def load_model_weights():
-    if os.path.exists(TUNING_CONFIG):
-        with open(TUNING_CONFIG, "r") as f:
-            return json.load(f)
-    return default_weights()
+    from models.performance_store import load_weights
+
+    return load_weights(default_weights())
 
 if __name__ == "__main__":
     update_model_weights()